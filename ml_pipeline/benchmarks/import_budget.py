@@ -0,0 +1,154 @@
+import argparse
+import json
+import logging
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+import sys
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PIPELINE_ROOT = Path(__file__).parent.parent
+
+IMPORT_BUDGETS = {
+    "config": 0.2,
+    "instrumentation": 0.2,
+    "db.storage": 0.3,
+    "db.supabase_client": 0.5,
+    "models.run_ledger": 0.3,
+    "models.analog_search": 0.5,
+    "data_acquisition.chirps_downloader": 1.0,
+    "data_acquisition.boundary_loader": 2.5,
+    "preprocessing.feature_calculator": 1.0,
+    "preprocessing.raster_processor": 1.5,
+    "models.prediction_pipeline": 2.0,
+}
+
+DEFERRED_MODULES = ("tensorflow", "keras", "pyarrow", "supabase")
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+preloaded = sorted(sys.modules)
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": seconds,
+    "loaded": [m for m in {deferred!r} if m in sys.modules],
+    "preloaded": preloaded,
+}}))
+"""
+
+
+def _parse_importtime(stderr: str, top: int, preloaded: set[str]) -> list[dict]:
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if name.strip() in preloaded:
+            continue
+        entries.append(
+            {
+                "module": name.strip(),
+                "self_ms": round(int(self_us) / 1000, 2),
+                "cumulative_ms": round(int(cumulative_us) / 1000, 2),
+            }
+        )
+    entries.sort(key=lambda e: e["self_ms"], reverse=True)
+    return entries[:top]
+
+
+def measure_import(module: str, repeats: int = 3, top: int = 5) -> dict:
+    timings = []
+    loaded: list[str] = []
+    slowest: list[dict] = []
+
+    for _ in range(repeats):
+        probe = _PROBE.format(root=str(PIPELINE_ROOT), module=module, deferred=DEFERRED_MODULES)
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", probe],
+            capture_output=True,
+            text=True,
+            cwd=PIPELINE_ROOT,
+        )
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1]
+            return {"module": module, "error": error}
+
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        loaded = result["loaded"]
+        slowest = _parse_importtime(completed.stderr, top, set(result["preloaded"]))
+
+    return {
+        "module": module,
+        "seconds": round(min(timings), 4),
+        "deferred_loaded": loaded,
+        "slowest_imports": slowest,
+    }
+
+
+def check_budgets(
+    budgets: Optional[dict[str, float]] = None,
+    repeats: int = 3,
+) -> tuple[list[dict], list[dict]]:
+    if budgets is None:
+        budgets = IMPORT_BUDGETS
+
+    results = []
+    violations = []
+
+    for module, budget in budgets.items():
+        result = measure_import(module, repeats)
+        result["budget"] = budget
+        results.append(result)
+
+        if "error" in result:
+            violations.append({"module": module, "reason": result["error"]})
+            continue
+
+        logger.info(f"{module}: {result['seconds']:.3f}s (budget {budget:.1f}s)")
+        if result["seconds"] > budget:
+            violations.append(
+                {"module": module, "reason": f"{result['seconds']:.3f}s exceeds {budget:.1f}s"}
+            )
+        if result["deferred_loaded"]:
+            violations.append(
+                {
+                    "module": module,
+                    "reason": f"imports deferred modules {result['deferred_loaded']}",
+                }
+            )
+
+    return results, violations
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check ml_pipeline entry point import times")
+    parser.add_argument("modules", nargs="*", help="Entry points to check (default: all)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args(argv)
+
+    modules = args.modules or list(IMPORT_BUDGETS)
+    budgets = {m: IMPORT_BUDGETS.get(m, 1.0) * args.scale for m in modules}
+    results, violations = check_budgets(budgets, args.repeats)
+
+    output = json.dumps({"results": results, "violations": violations}, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    print(output)
+
+    for violation in violations:
+        logger.warning(f"Import budget violation in {violation['module']}: {violation['reason']}")
+
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
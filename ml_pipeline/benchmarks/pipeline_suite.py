@@ -0,0 +1,309 @@
+import argparse
+import functools
+import gc
+import json
+import logging
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import CNN_CONFIG
+from db.storage import SQLiteBackend, set_storage
+from benchmarks.synthetic_data import (
+    month_range,
+    synthetic_boundaries,
+    write_synthetic_chirps,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+DEFAULT_BOUNDARY_COUNTS = [10, 50, 200]
+
+
+def measure(name: str, fn: Callable[[], None], n_items: int, unit: str) -> dict:
+    gc.collect()
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "stage": name,
+        "items": n_items,
+        "unit": unit,
+        "seconds": round(elapsed, 4),
+        "throughput": round(n_items / max(elapsed, 1e-9), 3),
+    }
+    if tracing:
+        _, peak = tracemalloc.get_traced_memory()
+        result["traced_peak_mb"] = round((peak - baseline) / 2**20, 1)
+    logger.info(f"{name}: {result['throughput']} {unit}/s ({elapsed:.3f}s)")
+    return result
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def bench_download(raster_dir: Path, download_dir: Path, months: list[date]) -> dict:
+    import data_acquisition.chirps_downloader as chirps_downloader
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(_QuietHandler, directory=str(raster_dir))
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    original_url = chirps_downloader.CHIRPS_MONTHLY_URL
+    chirps_downloader.CHIRPS_MONTHLY_URL = f"http://127.0.0.1:{server.server_port}"
+    try:
+        downloader = chirps_downloader.CHIRPSDownloader(cog=False)
+        downloader.monthly_dir = download_dir
+        download_dir.mkdir(parents=True, exist_ok=True)
+
+        def run():
+            for month_start in months:
+                downloader.download_monthly(month_start.year, month_start.month, force=True)
+
+        result = measure("chirps_download", run, len(months), "files")
+    finally:
+        chirps_downloader.CHIRPS_MONTHLY_URL = original_url
+        server.shutdown()
+
+    total_bytes = sum(p.stat().st_size for p in download_dir.glob("*.tif"))
+    result["mb_per_second"] = round(total_bytes / 2**20 / max(result["seconds"], 1e-9), 2)
+    return result
+
+
+def bench_process_rasters(raster_paths: list[Path]) -> dict:
+    from preprocessing.raster_processor import FrameWorkspace, RasterProcessor
+
+    processor = RasterProcessor()
+    workspace = FrameWorkspace(processor.target_shape)
+    out = np.empty(processor.target_shape, dtype=np.float32)
+
+    def run():
+        for path in raster_paths:
+            processor.process_single_raster(path, out=out, workspace=workspace)
+
+    return measure("process_single_raster", run, len(raster_paths), "rasters")
+
+
+def bench_feature_calculator(n_boundaries: int, seed: int = 42) -> dict:
+    from preprocessing.feature_calculator import FeatureCalculator
+
+    calculator = FeatureCalculator()
+    rng = np.random.default_rng(seed)
+    historical = {month: rng.gamma(3, 25, 30) for month in range(1, 13)}
+    series = rng.gamma(2, 40, (n_boundaries, CNN_CONFIG["time_steps"]))
+    spatial = rng.gamma(2, 40, (n_boundaries,) + (CNN_CONFIG["input_height"], CNN_CONFIG["input_width"]))
+    normal = np.full(spatial.shape[1:], 50.0)
+    vectors = rng.random((n_boundaries, CNN_CONFIG["feature_dim"]), dtype=np.float32)
+
+    def run():
+        for i in range(n_boundaries):
+            calculator.extract_features_for_boundary(
+                subcounty_code=f"KE{i:06d}",
+                feature_date=date(2024, 3, 1),
+                precip_time_series=series[i],
+                spatial_precip_current=spatial[i],
+                historical_monthly_precip=historical,
+                normal_values=normal,
+                cnn_feature_vector=vectors[i],
+            )
+
+    return measure(f"extract_features_for_boundary@{n_boundaries}", run, n_boundaries, "boundaries")
+
+
+def bench_inference(model, n_boundaries: int, seed: int = 42) -> dict:
+    rng = np.random.default_rng(seed)
+    X = rng.random(
+        (
+            n_boundaries,
+            CNN_CONFIG["time_steps"],
+            CNN_CONFIG["input_height"],
+            CNN_CONFIG["input_width"],
+            CNN_CONFIG["channels"],
+        ),
+        dtype=np.float32,
+    )
+    model.predict(X[:1])
+
+    def run():
+        model.predict(X)
+        model.extract_features(X)
+
+    return measure(f"model_inference@{n_boundaries}", run, n_boundaries, "sequences")
+
+
+def bench_monthly_run(
+    storage: SQLiteBackend,
+    pipeline,
+    boundaries: list[dict],
+    target_month: date,
+    pipelined: bool,
+) -> dict:
+    storage.delete("asal_admin3_boundaries")
+    storage.insert("asal_admin3_boundaries", boundaries)
+
+    def run():
+        pipeline.run_monthly_predictions(target_month, save_to_db=True, force=True, pipelined=pipelined)
+
+    name = "run_monthly_predictions_pipelined" if pipelined else "run_monthly_predictions"
+    return measure(f"{name}@{len(boundaries)}", run, len(boundaries), "boundaries")
+
+
+def run_suite(
+    boundary_counts: Optional[list[int]] = None,
+    n_months: int = CNN_CONFIG["time_steps"],
+    scale: float = 0.5,
+    seed: int = 42,
+) -> dict:
+    if boundary_counts is None:
+        boundary_counts = DEFAULT_BOUNDARY_COUNTS
+
+    from db.feature_store import LocalFeatureStore
+    from models.cnn_architecture import HungerPredictionModel
+    from models.prediction_pipeline import HungerPredictionPipeline
+    from models.run_ledger import RunLedger
+
+    stages = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        storage = set_storage(SQLiteBackend(tmp / "pipeline.sqlite"))
+        months = month_range(date(2023, 1, 1), n_months)
+        records = write_synthetic_chirps(tmp / "chirps", months, scale=scale, seed=seed)
+        raster_paths = [Path(r["file_path"]) for r in records]
+
+        stages.append(bench_download(tmp / "chirps", tmp / "downloads", months))
+        storage.delete("chirps_raster_metadata")
+        storage.insert("chirps_raster_metadata", records)
+
+        stages.append(bench_process_rasters(raster_paths))
+
+        model = HungerPredictionModel(model_type="spatiotemporal")
+        model.build()
+        model.compile()
+
+        pipeline = HungerPredictionPipeline(
+            ledger=RunLedger(tmp / "run_ledger.sqlite"),
+            feature_store=LocalFeatureStore(tmp / "feature_store"),
+        )
+        pipeline.model = model
+        target_month = month_range(months[-1], 2)[1]
+        context = pipeline.resolve_run_context(target_month, CNN_CONFIG["time_steps"])
+        if not context.is_complete:
+            raise RuntimeError(
+                f"Synthetic archive does not cover {target_month}: need "
+                f"{context.sequence_length} rasters, have {len(context.raster_paths)}"
+            )
+
+        for n_boundaries in boundary_counts:
+            boundaries = synthetic_boundaries(n_boundaries, seed=seed)
+            stages.append(bench_feature_calculator(n_boundaries, seed=seed))
+            stages.append(bench_inference(model, n_boundaries, seed=seed))
+            for pipelined in (False, True):
+                stages.append(
+                    bench_monthly_run(storage, pipeline, boundaries, target_month, pipelined)
+                )
+
+    return {
+        "config": {
+            "boundary_counts": boundary_counts,
+            "n_months": n_months,
+            "raster_scale": scale,
+            "seed": seed,
+        },
+        "stages": {stage["stage"]: stage for stage in stages},
+    }
+
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float = 0.2) -> list[dict]:
+    regressions = []
+
+    for name, stage in report["stages"].items():
+        reference = baseline.get("stages", {}).get(name)
+        if reference is None:
+            continue
+
+        ratio = stage["throughput"] / max(reference["throughput"], 1e-9)
+        stage["baseline_throughput"] = reference["throughput"]
+        stage["throughput_ratio"] = round(ratio, 3)
+
+        if ratio < 1 - tolerance:
+            regressions.append(
+                {
+                    "stage": name,
+                    "baseline_throughput": reference["throughput"],
+                    "throughput": stage["throughput"],
+                    "ratio": round(ratio, 3),
+                }
+            )
+
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ml_pipeline stages")
+    parser.add_argument("--boundary-counts", type=int, nargs="+", default=DEFAULT_BOUNDARY_COUNTS)
+    parser.add_argument("--months", type=int, default=CNN_CONFIG["time_steps"])
+    parser.add_argument("--scale", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Report per-stage peak of Python/NumPy allocations (slows stages)")
+    args = parser.parse_args(argv)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    try:
+        report = run_suite(args.boundary_counts, args.months, args.scale, args.seed)
+    finally:
+        tracemalloc.stop()
+
+    regressions = []
+    if args.baseline.exists() and not args.update_baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+    report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    print(output)
+
+    if args.update_baseline:
+        args.baseline.write_text(output)
+        logger.info(f"Updated baseline at {args.baseline}")
+
+    for regression in regressions:
+        logger.warning(
+            f"Regression in {regression['stage']}: {regression['throughput']} vs "
+            f"baseline {regression['baseline_throughput']} ({regression['ratio']:.2f}x)"
+        )
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+CHIRPS_AFRICA_ORIGIN = (-20.0, 40.0)
+CHIRPS_AFRICA_SHAPE = (1600, 1500)
+CHIRPS_RESOLUTION_DEG = 0.05
+CHIRPS_NODATA = -9999.0
+
+
+def month_range(start_month: date, n_months: int) -> list[date]:
+    year, month = start_month.year, start_month.month
+    months = []
+    for _ in range(n_months):
+        months.append(date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def month_end(month_start: date) -> date:
+    if month_start.month == 12:
+        return date(month_start.year + 1, 1, 1) - timedelta(days=1)
+    return date(month_start.year, month_start.month + 1, 1) - timedelta(days=1)
+
+
+def write_synthetic_chirps(
+    output_dir: Path,
+    months: list[date],
+    scale: float = 1.0,
+    nodata_fraction: float = 0.05,
+    seed: int = 42,
+) -> list[dict]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    height = max(1, int(CHIRPS_AFRICA_SHAPE[0] * scale))
+    width = max(1, int(CHIRPS_AFRICA_SHAPE[1] * scale))
+    resolution = CHIRPS_RESOLUTION_DEG / scale
+    transform = from_origin(*CHIRPS_AFRICA_ORIGIN, resolution, resolution)
+
+    records = []
+    for month_start in months:
+        data = rng.gamma(2.0, 40.0, size=(height, width)).astype(np.float32)
+        data[rng.random((height, width)) < nodata_fraction] = CHIRPS_NODATA
+
+        filename = f"chirps-v2.0.{month_start.year}.{month_start.month:02d}.tif"
+        path = output_dir / filename
+        with rasterio.open(
+            path,
+            "w",
+            driver="GTiff",
+            height=height,
+            width=width,
+            count=1,
+            dtype="float32",
+            crs="EPSG:4326",
+            transform=transform,
+            nodata=CHIRPS_NODATA,
+        ) as dst:
+            dst.write(data, 1)
+
+        records.append(
+            {
+                "data_type": "monthly",
+                "year": month_start.year,
+                "month": month_start.month,
+                "dekad": None,
+                "start_date": month_start.isoformat(),
+                "end_date": month_end(month_start).isoformat(),
+                "file_path": str(path),
+                "file_size_bytes": path.stat().st_size,
+                "checksum": None,
+                "min_lat": CHIRPS_AFRICA_ORIGIN[1] - height * resolution,
+                "max_lat": CHIRPS_AFRICA_ORIGIN[1],
+                "min_lng": CHIRPS_AFRICA_ORIGIN[0],
+                "max_lng": CHIRPS_AFRICA_ORIGIN[0] + width * resolution,
+                "source_url": f"file://{path}",
+                "download_status": "completed",
+                "processed": False,
+            }
+        )
+
+    return records
+
+
+def synthetic_boundaries(n_boundaries: int, seed: int = 42) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    boundaries = []
+    for i in range(n_boundaries):
+        lat = float(rng.uniform(-4.5, 5.0))
+        lng = float(rng.uniform(34.0, 41.5))
+        boundaries.append(
+            {
+                "subcounty_code": f"KE{i:06d}",
+                "subcounty_name": f"Synthetic {i}",
+                "county_code": f"{i % 23:03d}",
+                "county_name": f"County {i % 23}",
+                "population": int(rng.integers(10_000, 250_000)),
+                "centroid_lat": lat,
+                "centroid_lng": lng,
+                "bbox_min_lat": lat - 0.25,
+                "bbox_max_lat": lat + 0.25,
+                "bbox_min_lng": lng - 0.25,
+                "bbox_max_lng": lng + 0.25,
+                "area_km2": 3000.0,
+                "geometry_geojson": {
+                    "type": "Polygon",
+                    "coordinates": [[
+                        [lng - 0.25, lat - 0.25],
+                        [lng + 0.25, lat - 0.25],
+                        [lng + 0.25, lat + 0.25],
+                        [lng - 0.25, lat + 0.25],
+                        [lng - 0.25, lat - 0.25],
+                    ]],
+                },
+            }
+        )
+    return boundaries
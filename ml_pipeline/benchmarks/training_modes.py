@@ -0,0 +1,105 @@
+import json
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+from tensorflow import keras
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import CNN_CONFIG
+from models.cnn_architecture import HungerPredictionModel, cpu_supports_bfloat16
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_TYPES = ["spatiotemporal", "conv2d_lstm", "convlstm"]
+
+
+class EpochTimer(keras.callbacks.Callback):
+    def __init__(self):
+        super().__init__()
+        self.epoch_seconds = []
+        self._start = 0.0
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epoch_seconds.append(time.perf_counter() - self._start)
+
+
+def time_training(
+    model_type: str,
+    performance_mode: bool,
+    X: np.ndarray,
+    y: np.ndarray,
+    epochs: int = 3,
+    batch_size: int = None,
+) -> dict:
+    if batch_size is None:
+        batch_size = CNN_CONFIG["batch_size"]
+
+    model = HungerPredictionModel(model_type=model_type, performance_mode=performance_mode)
+    model.build()
+    model.compile()
+
+    timer = EpochTimer()
+    model.model.fit(X, y, epochs=epochs, batch_size=batch_size, callbacks=[timer], verbose=0)
+
+    steady_state = timer.epoch_seconds[1:] or timer.epoch_seconds
+
+    return {
+        "model_type": model_type,
+        "performance_mode": performance_mode,
+        "dtype_policy": model.model.dtype_policy.name,
+        "first_epoch_s": round(timer.epoch_seconds[0], 3),
+        "mean_epoch_s": round(float(np.mean(steady_state)), 3),
+    }
+
+
+def benchmark_performance_modes(
+    model_types: list[str] = None,
+    n_samples: int = 64,
+    epochs: int = 3,
+    seed: int = 42,
+) -> dict:
+    if model_types is None:
+        model_types = MODEL_TYPES
+
+    rng = np.random.default_rng(seed)
+    X = rng.random(
+        (
+            n_samples,
+            CNN_CONFIG["time_steps"],
+            CNN_CONFIG["input_height"],
+            CNN_CONFIG["input_width"],
+            CNN_CONFIG["channels"],
+        ),
+        dtype=np.float32,
+    )
+    y = rng.integers(0, 5, n_samples)
+
+    results = {"cpu_supports_bfloat16": cpu_supports_bfloat16(), "architectures": {}}
+
+    for model_type in model_types:
+        baseline = time_training(model_type, False, X, y, epochs)
+        optimized = time_training(model_type, True, X, y, epochs)
+        speedup = baseline["mean_epoch_s"] / max(optimized["mean_epoch_s"], 1e-9)
+
+        results["architectures"][model_type] = {
+            "baseline": baseline,
+            "performance_mode": optimized,
+            "epoch_speedup": round(speedup, 2),
+        }
+        logger.info(
+            f"{model_type}: {baseline['mean_epoch_s']}s -> "
+            f"{optimized['mean_epoch_s']}s per epoch ({speedup:.2f}x)"
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(benchmark_performance_modes(), indent=2))
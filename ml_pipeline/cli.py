@@ -0,0 +1,577 @@
+import argparse
+import json
+import logging
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+import sys
+sys.path.append(str(Path(__file__).parent))
+
+logger = logging.getLogger("ml_pipeline")
+
+DIRECTORY_ENV = {
+    "data_dir": "ML_PIPELINE_DATA_DIR",
+    "raster_dir": "ML_PIPELINE_RASTER_DIR",
+    "processed_dir": "ML_PIPELINE_PROCESSED_DIR",
+    "model_dir": "ML_PIPELINE_MODEL_DIR",
+    "local_db": "ML_PIPELINE_LOCAL_DB",
+}
+
+
+def parse_month(value: str) -> date:
+    try:
+        year, month = value.split("-")[:2]
+        return date(int(year), int(month), 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected YYYY-MM, got {value!r}") from None
+
+
+def parse_day(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected YYYY-MM-DD, got {value!r}") from None
+
+
+def month_end(month: Optional[date]) -> Optional[date]:
+    if month is None:
+        return None
+    next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return next_month - timedelta(days=1)
+
+
+def model_data_type(model_version: str) -> str:
+    from config import TEMPORAL_CONFIG
+
+    if model_version.endswith(TEMPORAL_CONFIG["dekadal_model_suffix"]):
+        return "dekadal"
+    return "monthly"
+
+
+def current_month() -> date:
+    today = date.today()
+    return date(today.year, today.month, 1)
+
+
+def month_periods(start: date, end: date) -> list[tuple[int, int]]:
+    periods = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        periods.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return periods
+
+
+def apply_environment(args: argparse.Namespace):
+    for attr, env in DIRECTORY_ENV.items():
+        value = getattr(args, attr, None)
+        if value is not None:
+            os.environ[env] = str(Path(value).resolve())
+    if args.storage:
+        os.environ["ML_PIPELINE_STORAGE"] = args.storage
+    if args.region:
+        os.environ["ML_PIPELINE_REGION"] = args.region
+
+
+def apply_tuning(args: argparse.Namespace):
+    from config import CNN_CONFIG, PIPELINE_CONFIG
+    import instrumentation
+
+    overrides = {
+        "io_workers": args.io_workers,
+        "inference_batch_size": args.inference_batch_size,
+        "queue_size": args.queue_size,
+    }
+    PIPELINE_CONFIG.update({k: v for k, v in overrides.items() if v is not None})
+
+    if getattr(args, "batch_size", None) is not None:
+        CNN_CONFIG["batch_size"] = args.batch_size
+
+    if args.profile:
+        instrumentation.enable(prometheus=args.prometheus)
+
+
+def print_plan(plan: dict):
+    print(json.dumps(plan, indent=2, default=str))
+
+
+def cmd_download(args: argparse.Namespace) -> int:
+    from config import ARCHIVE_CONFIG, RASTER_DIR
+    from data_acquisition.chirps_downloader import CHIRPSDownloader
+
+    periods = month_periods(args.start, args.end)
+    if args.derive_monthly:
+        args.data_type = "monthly"
+    cog = ARCHIVE_CONFIG["cog"] if args.cog is None else args.cog
+    keep_source = ARCHIVE_CONFIG["keep_source"] and not args.drop_source
+
+    if args.dry_run:
+        from regions import get_region
+
+        downloader_dir = RASTER_DIR / args.data_type
+        if cog:
+            downloader_dir = RASTER_DIR / "cog" / get_region()["key"] / args.data_type
+        pattern = "chirps-v2.0.{}.{:02d}" + (".tif" if args.data_type == "monthly" else ".*.tif")
+        existing = [
+            f"{y}-{m:02d}" for y, m in periods
+            if any(downloader_dir.glob(pattern.format(y, m)))
+        ]
+        dekads_to_fetch = 0
+        if args.derive_monthly:
+            dekadal_dir = downloader_dir.parent / "dekadal"
+            dekads_to_fetch = sum(
+                not (dekadal_dir / f"chirps-v2.0.{y}.{m:02d}.{d}.tif").exists()
+                for y, m in periods
+                for d in range(1, 4)
+            )
+        print_plan(
+            {
+                "command": "download",
+                "data_type": args.data_type,
+                "periods": len(periods),
+                "files": len(periods) * (1 if args.data_type == "monthly" else 3),
+                "already_present": len(existing),
+                "force": args.force,
+                "workers": args.workers,
+                "cog": cog,
+                "keep_source": keep_source,
+                "derive_monthly": args.derive_monthly,
+                "dekads_to_fetch": dekads_to_fetch,
+                "target_dir": downloader_dir,
+            }
+        )
+        return 0
+
+    downloader = CHIRPSDownloader(cog=cog, keep_source=keep_source)
+    if args.derive_monthly:
+        results = downloader.derive_monthly_periods(periods, args.force, args.workers)
+    else:
+        results = downloader.download_periods(periods, args.data_type, args.force, args.workers)
+    failed = sorted(key for key, ok in results.items() if not ok)
+
+    logger.info(f"Downloaded {len(results) - len(failed)}/{len(results)} {args.data_type} files")
+    for key in failed:
+        logger.error(f"Failed: {key}")
+    return 1 if failed else 0
+
+
+def _available_rasters(args: argparse.Namespace) -> list[dict]:
+    from db.supabase_client import get_raster_metadata
+
+    return get_raster_metadata(
+        args.data_type,
+        args.start.isoformat() if args.start else None,
+        month_end(args.end).isoformat() if args.end else None,
+    )
+
+
+def cmd_preprocess(args: argparse.Namespace) -> int:
+    if args.dry_run:
+        from config import PROCESSED_DIR
+
+        rasters = _available_rasters(args)
+        present = [r for r in rasters if r["file_path"] and Path(r["file_path"]).exists()]
+        print_plan(
+            {
+                "command": "preprocess",
+                "data_type": args.data_type,
+                "rasters_catalogued": len(rasters),
+                "rasters_on_disk": len(present),
+                "output": args.output or PROCESSED_DIR / f"frames_{args.data_type}.npy",
+            }
+        )
+        return 0
+
+    from preprocessing.raster_processor import RasterProcessor
+
+    path = RasterProcessor().build_frame_archive(
+        data_type=args.data_type,
+        output_path=args.output,
+        start_date=args.start,
+        end_date=month_end(args.end),
+    )
+    return 0 if path is not None else 1
+
+
+def cmd_build_climatology(args: argparse.Namespace) -> int:
+    rasters = _available_rasters(args)
+
+    if args.dry_run:
+        from config import PROCESSED_DIR
+
+        months = sorted({int(str(r["start_date"])[5:7]) for r in rasters})
+        print_plan(
+            {
+                "command": "build-climatology",
+                "rasters": len(rasters),
+                "calendar_months": months,
+                "min_gamma_samples": args.min_gamma_samples,
+                "engine": "cube" if args.cube else "rasters",
+                "output": args.output or PROCESSED_DIR / "spi_parameter_grids.npz",
+            }
+        )
+        return 0
+
+    from preprocessing.raster_processor import RasterProcessor, SPICalculator
+
+    if not rasters:
+        logger.error("No rasters available for climatology")
+        return 1
+
+    calculator = SPICalculator(min_gamma_samples=args.min_gamma_samples)
+    if args.cube:
+        from preprocessing.datacube import CHIRPSCube
+
+        processor = RasterProcessor()
+        cube = CHIRPSCube.from_geotiffs(
+            processor.region, data_type=args.data_type, start=args.start, end=month_end(args.end)
+        )
+        cube.to_target_grid(processor.target_shape).fit_spi(calculator)
+    else:
+        calculator.fit_from_rasters(RasterProcessor(), rasters)
+    calculator.save_parameters(args.output)
+    return 0
+
+
+def cmd_zonal_stats(args: argparse.Namespace) -> int:
+    from db.supabase_client import get_admin3_boundaries
+
+    args.start = args.end = args.month
+    rasters = [
+        r for r in _available_rasters(args) if r["file_path"] and Path(r["file_path"]).exists()
+    ]
+    boundaries = get_admin3_boundaries()
+
+    if args.dry_run:
+        print_plan(
+            {
+                "command": "zonal-stats",
+                "month": args.month,
+                "data_type": args.data_type,
+                "rasters": len(rasters),
+                "boundaries": len(boundaries),
+                "output": args.output,
+            }
+        )
+        return 0
+
+    from preprocessing.raster_processor import RasterProcessor
+
+    if not rasters or not boundaries:
+        logger.error("Zonal statistics need at least one raster and one boundary")
+        return 1
+
+    processor = RasterProcessor()
+    results = []
+    for raster in rasters:
+        for stats in processor.zonal_statistics(Path(raster["file_path"]), boundaries):
+            results.append({"start_date": raster["start_date"], **stats})
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+        logger.info(f"Wrote {len(results)} zonal statistics to {args.output}")
+    else:
+        print_plan(results)
+    return 0
+
+
+def cmd_train(args: argparse.Namespace) -> int:
+    from config import PROCESSED_DIR
+    from db.supabase_client import get_ipc_historical
+
+    data_type = model_data_type(args.model_version)
+    archive = args.archive or PROCESSED_DIR / f"frames_{data_type}.npy"
+    if not archive.exists():
+        logger.error(f"Frame archive not found: {archive} (run preprocess first)")
+        return 1
+
+    ipc_rows = get_ipc_historical()
+
+    if args.dry_run:
+        from models.training_data import build_training_index, split_training_index
+
+        index = build_training_index(archive, ipc_rows, sequence_length=args.sequence_length)
+        train_index, val_index = split_training_index(index, args.val_fraction, seed=args.seed)
+        print_plan(
+            {
+                "command": "train",
+                "archive": archive,
+                "ipc_rows": len(ipc_rows),
+                "train_windows": len(train_index["labels"]),
+                "val_windows": len(val_index["labels"]),
+                "zones": len(index["zone_codes"]),
+                "model_type": args.model_type,
+                "epochs": args.epochs,
+                "batch_size": args.batch_size,
+            }
+        )
+        return 0
+
+    from db.supabase_client import get_admin3_boundaries
+    from models.cnn_architecture import HungerPredictionModel
+    from models.training_data import build_training_datasets
+
+    train_dataset, val_dataset = build_training_datasets(
+        archive,
+        ipc_rows,
+        get_admin3_boundaries(),
+        val_fraction=args.val_fraction,
+        sequence_length=args.sequence_length,
+        batch_size=args.batch_size,
+        seed=args.seed,
+        cache_dir=args.cache_dir,
+    )
+
+    model = HungerPredictionModel(
+        model_type=args.model_type,
+        model_version=args.model_version,
+        performance_mode=args.performance_mode,
+    )
+    model.build()
+    model.compile()
+    model.train_on_dataset(train_dataset, val_dataset, epochs=args.epochs)
+    model.save(args.output)
+
+    if args.export_inference:
+        model.export_inference()
+    return 0
+
+
+def _build_pipeline(args: argparse.Namespace):
+    from models.prediction_pipeline import HungerPredictionPipeline
+
+    pipeline = HungerPredictionPipeline(model_version=args.model_version)
+    pipeline.load_model(args.model_path)
+    return pipeline
+
+
+def cmd_predict(args: argparse.Namespace) -> int:
+    target_month = args.month or current_month()
+    if args.dekadal or args.dekad:
+        from models.prediction_pipeline import dekad_end, latest_complete_dekad
+
+        args.dekadal = True
+        target_month = dekad_end(args.dekad or latest_complete_dekad())
+
+    data_type = "dekadal" if args.dekadal else "monthly"
+    if model_data_type(args.model_version) != data_type:
+        logger.error(
+            f"Model version {args.model_version!r} was not trained on {data_type} frames; "
+            "dekadal predictions need a dekad-trained version ending in '-dekadal'"
+        )
+        return 1
+
+    if args.dry_run:
+        from config import CNN_CONFIG, TEMPORAL_CONFIG
+        from db.supabase_client import get_admin3_boundaries
+        from models.prediction_pipeline import RunContext
+        from models.run_ledger import RunLedger
+        from preprocessing.raster_processor import RasterProcessor
+
+        if args.dekadal:
+            context = RunContext.resolve(
+                RasterProcessor(),
+                target_month,
+                TEMPORAL_CONFIG["sequence_length_dekads"],
+                data_type="dekadal",
+            )
+        else:
+            context = RunContext.resolve(
+                RasterProcessor(), target_month, CNN_CONFIG["time_steps"]
+            )
+        ledger = RunLedger()
+        boundaries = get_admin3_boundaries()
+        cached = sum(
+            1 for b in boundaries
+            if ledger.lookup(
+                b["subcounty_code"], target_month, args.model_version, context.input_checksum
+            ) is not None
+        )
+        print_plan(
+            {
+                "command": "predict",
+                "target_month": target_month,
+                "data_type": context.data_type,
+                "model_version": args.model_version,
+                "inputs_complete": context.is_complete,
+                "source_files": len(context.raster_paths),
+                "boundaries": len(boundaries),
+                "ledger_hits": cached if not args.force else 0,
+                "force": args.force,
+                "pipelined": args.pipelined,
+                "save_to_db": not args.no_save,
+            }
+        )
+        return 0
+
+    pipeline = _build_pipeline(args)
+    if args.dekadal:
+        pipeline.run_dekadal_predictions(
+            target_month,
+            save_to_db=not args.no_save,
+            force=args.force,
+            pipelined=args.pipelined,
+        )
+    else:
+        pipeline.run_monthly_predictions(
+            target_month,
+            save_to_db=not args.no_save,
+            force=args.force,
+            pipelined=args.pipelined,
+        )
+    print_plan(pipeline.get_prediction_summary(pipeline.last_result_set))
+    return 0
+
+
+def cmd_backfill(args: argparse.Namespace) -> int:
+    if args.dry_run:
+        from config import CNN_CONFIG, TEMPORAL_CONFIG
+        from models.prediction_pipeline import RunContext, iter_target_months
+        from models.run_ledger import RunLedger
+        from preprocessing.raster_processor import RasterProcessor
+
+        ledger = RunLedger()
+        processor = RasterProcessor()
+        contexts = [
+            RunContext.resolve(processor, m, CNN_CONFIG["time_steps"])
+            for m in iter_target_months(args.start, args.end)
+        ]
+        committed = [
+            c for c in contexts
+            if ledger.is_month_committed(c.target_month, args.model_version, c.input_checksum)
+        ]
+        print_plan(
+            {
+                "command": "backfill",
+                "months": len(contexts),
+                "incomplete_inputs": sum(1 for c in contexts if not c.is_complete),
+                "already_committed": len(committed) if not args.force else 0,
+                "chunk_size": args.chunk_size or TEMPORAL_CONFIG["backfill_chunk_size"],
+                "model_version": args.model_version,
+            }
+        )
+        return 0
+
+    pipeline = _build_pipeline(args)
+    completed = pipeline.run_backfill(args.start, args.end, args.chunk_size, args.force)
+    logger.info(
+        f"Backfill committed {sum(completed.values())} predictions "
+        f"across {len(completed)} months"
+    )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--dry-run", action="store_true", help="Print the plan without running it")
+    common.add_argument("--verbose", "-v", action="store_true")
+    common.add_argument("--storage", choices=["supabase", "sqlite"])
+    common.add_argument("--local-db", type=Path)
+    common.add_argument("--region", help="Region key from regions.json (default kenya_asal)")
+    common.add_argument("--data-dir", type=Path)
+    common.add_argument("--raster-dir", type=Path)
+    common.add_argument("--processed-dir", type=Path)
+    common.add_argument("--model-dir", type=Path)
+    common.add_argument("--io-workers", type=int)
+    common.add_argument("--inference-batch-size", type=int)
+    common.add_argument("--queue-size", type=int)
+    common.add_argument("--profile", action="store_true", help="Write a run profile")
+    common.add_argument("--prometheus", action="store_true", help="Also write .prom output")
+
+    parser = argparse.ArgumentParser(prog="ml_pipeline", description="Hunger prediction pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    download = commands.add_parser("download", parents=[common], help="Download CHIRPS rasters")
+    download.add_argument("--start", type=parse_month, required=True)
+    download.add_argument("--end", type=parse_month, required=True)
+    download.add_argument("--data-type", choices=["monthly", "dekadal"], default="monthly")
+    download.add_argument("--workers", type=int, default=4)
+    download.add_argument("--force", action="store_true")
+    download.add_argument("--cog", action=argparse.BooleanOptionalAction, default=None,
+                          help="Archive a clipped Cloud-Optimized GeoTIFF of the region")
+    download.add_argument("--drop-source", action="store_true",
+                          help="Delete the continental GeoTIFF once its COG is written")
+    download.add_argument("--derive-monthly", action="store_true",
+                          help="Sum dekads into monthly rasters, fetching only missing dekads")
+    download.set_defaults(handler=cmd_download)
+
+    for name, handler, help_text in (
+        ("preprocess", cmd_preprocess, "Build the frame archive"),
+        ("build-climatology", cmd_build_climatology, "Fit per-pixel SPI parameter grids"),
+    ):
+        sub = commands.add_parser(name, parents=[common], help=help_text)
+        sub.add_argument("--start", type=parse_month)
+        sub.add_argument("--end", type=parse_month)
+        sub.add_argument("--data-type", choices=["monthly", "dekadal"], default="monthly")
+        sub.add_argument("--output", type=Path)
+        sub.set_defaults(handler=handler)
+        if name == "build-climatology":
+            sub.add_argument("--min-gamma-samples", type=int, default=30)
+            sub.add_argument("--cube", action="store_true",
+                             help="Fit out-of-core from the lazy CHIRPS data cube")
+
+    zonal = commands.add_parser(
+        "zonal-stats", parents=[common], help="Per-subcounty precipitation statistics"
+    )
+    zonal.add_argument("--month", type=parse_month, required=True)
+    zonal.add_argument("--data-type", choices=["monthly", "dekadal"], default="monthly")
+    zonal.add_argument("--output", type=Path)
+    zonal.set_defaults(handler=cmd_zonal_stats)
+
+    train = commands.add_parser("train", parents=[common], help="Train the CNN")
+    train.add_argument("--archive", type=Path)
+    train.add_argument("--model-type", default="spatiotemporal",
+                       choices=["spatiotemporal", "conv2d_lstm", "convlstm"])
+    train.add_argument("--model-version", default="v1.0")
+    train.add_argument("--epochs", type=int)
+    train.add_argument("--batch-size", type=int)
+    train.add_argument("--sequence-length", type=int)
+    train.add_argument("--val-fraction", type=float, default=0.2)
+    train.add_argument("--seed", type=int)
+    train.add_argument("--cache-dir", type=Path, help="tf.data cache for decoded windows")
+    train.add_argument("--performance-mode", action="store_true")
+    train.add_argument("--export-inference", action="store_true")
+    train.add_argument("--output", type=Path)
+    train.set_defaults(handler=cmd_train)
+
+    predict = commands.add_parser("predict", parents=[common], help="Run monthly predictions")
+    predict.add_argument("--month", type=parse_month)
+    predict.add_argument("--dekadal", action="store_true",
+                         help="Predict from dekads with a model version ending in -dekadal")
+    predict.add_argument("--dekad", type=parse_day,
+                         help="Any day in the target dekad (default: latest complete dekad)")
+    predict.add_argument("--model-version", default="v1.0")
+    predict.add_argument("--model-path", type=Path)
+    predict.add_argument("--pipelined", action="store_true")
+    predict.add_argument("--force", action="store_true")
+    predict.add_argument("--no-save", action="store_true")
+    predict.set_defaults(handler=cmd_predict)
+
+    backfill = commands.add_parser("backfill", parents=[common], help="Backfill a month range")
+    backfill.add_argument("--start", type=parse_month, required=True)
+    backfill.add_argument("--end", type=parse_month, required=True)
+    backfill.add_argument("--model-version", default="v1.0")
+    backfill.add_argument("--model-path", type=Path)
+    backfill.add_argument("--chunk-size", type=int)
+    backfill.add_argument("--force", action="store_true")
+    backfill.set_defaults(handler=cmd_backfill)
+
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    apply_environment(args)
+    apply_tuning(args)
+
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
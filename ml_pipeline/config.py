@@ -5,29 +5,25 @@ from dotenv import load_dotenv
 load_dotenv()
 
 BASE_DIR = Path(__file__).parent
-DATA_DIR = BASE_DIR / "data"
-RASTER_DIR = DATA_DIR / "rasters"
-PROCESSED_DIR = DATA_DIR / "processed"
-MODEL_DIR = BASE_DIR / "models"
+DATA_DIR = Path(os.getenv("ML_PIPELINE_DATA_DIR", BASE_DIR / "data"))
+RASTER_DIR = Path(os.getenv("ML_PIPELINE_RASTER_DIR", DATA_DIR / "rasters"))
+PROCESSED_DIR = Path(os.getenv("ML_PIPELINE_PROCESSED_DIR", DATA_DIR / "processed"))
+MODEL_DIR = Path(os.getenv("ML_PIPELINE_MODEL_DIR", BASE_DIR / "models"))
 BOUNDARY_DIR = DATA_DIR / "boundaries"
-
-for dir_path in [DATA_DIR, RASTER_DIR, PROCESSED_DIR, MODEL_DIR, BOUNDARY_DIR]:
-    dir_path.mkdir(parents=True, exist_ok=True)
+MIGRATIONS_DIR = BASE_DIR.parent / "supabase" / "migrations"
+REGIONS_PATH = Path(os.getenv("ML_PIPELINE_REGIONS", BASE_DIR / "regions.json"))
+DEFAULT_REGION = os.getenv("ML_PIPELINE_REGION", "kenya_asal")
 
 SUPABASE_URL = os.getenv("VITE_SUPABASE_URL")
 SUPABASE_KEY = os.getenv("VITE_SUPABASE_ANON_KEY")
 
+STORAGE_BACKEND = os.getenv("ML_PIPELINE_STORAGE", "supabase")
+LOCAL_DB_PATH = Path(os.getenv("ML_PIPELINE_LOCAL_DB", DATA_DIR / "pipeline.sqlite"))
+
 CHIRPS_BASE_URL = "https://data.chc.ucsb.edu/products/CHIRPS-2.0"
 CHIRPS_MONTHLY_URL = f"{CHIRPS_BASE_URL}/africa_monthly/tifs"
 CHIRPS_DEKADAL_URL = f"{CHIRPS_BASE_URL}/africa_dekad/tifs"
 
-KENYA_ASAL_BBOX = {
-    "min_lat": -5.0,
-    "max_lat": 5.5,
-    "min_lng": 33.5,
-    "max_lng": 42.0
-}
-
 ASAL_COUNTIES = [
     {"name": "Turkana", "code": "023"},
     {"name": "Marsabit", "code": "010"},
@@ -60,6 +56,8 @@ TEMPORAL_CONFIG = {
     "inference_lookback_months": 12,
     "sequence_length_dekads": 12,
     "sequence_length_months": 6,
+    "backfill_chunk_size": 25,
+    "dekadal_model_suffix": "-dekadal",
 }
 
 CNN_CONFIG = {
@@ -73,6 +71,37 @@ CNN_CONFIG = {
     "batch_size": 32,
     "epochs": 100,
     "early_stopping_patience": 10,
+    "shuffle_buffer_size": 1024,
+}
+
+PIPELINE_CONFIG = {
+    "io_workers": 4,
+    "inference_batch_size": 16,
+    "queue_size": 32,
+}
+
+TILING_CONFIG = {
+    "tile_size": 512,
+    "halo": 32,
+    "workers": None,
+    "max_inflight": None,
+    "source_resolution_deg": 0.05,
+    "min_region_pixels": 1_000_000,
+}
+
+ARCHIVE_CONFIG = {
+    "cog": os.getenv("ML_PIPELINE_COG", "0") == "1",
+    "keep_source": os.getenv("ML_PIPELINE_KEEP_SOURCE", "1") == "1",
+    "compress": "DEFLATE",
+    "level": None,
+    "predictor": 3,
+    "blocksize": 256,
+}
+
+CUBE_CONFIG = {
+    "chunks": {"time": 12, "y": 512, "x": 512},
+    "scheduler": "threads",
+    "workers": None,
 }
 
 NORMALIZATION_CONFIG = {
@@ -9,8 +9,9 @@ from shapely.geometry import shape, mapping
 
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
-from config import BOUNDARY_DIR, ASAL_COUNTIES, KENYA_ASAL_BBOX
-from db.supabase_client import get_supabase_client, insert_admin3_boundary
+from config import BOUNDARY_DIR, ASAL_COUNTIES
+from db.supabase_client import get_admin3_boundaries, insert_admin3_boundary
+from regions import get_region
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,10 +20,11 @@ KENYA_ADMIN3_URL = "https://data.humdata.org/dataset/cod-ab-ken"
 
 
 class KenyaBoundaryLoader:
-    def __init__(self):
-        self.supabase = get_supabase_client()
+    def __init__(self, region: Optional[str | dict] = None):
         self.boundary_dir = BOUNDARY_DIR
         self.asal_county_names = {c["name"].lower() for c in ASAL_COUNTIES}
+        self.region = get_region(region)
+        self.bbox = self.region["bbox"]
 
     def load_shapefile(self, shapefile_path: Path) -> gpd.GeoDataFrame:
         if not shapefile_path.exists():
@@ -39,7 +41,10 @@ class KenyaBoundaryLoader:
         gdf["county_lower"] = gdf[county_column].str.lower().str.strip()
         asal_gdf = gdf[gdf["county_lower"].isin(self.asal_county_names)].copy()
         asal_gdf.drop(columns=["county_lower"], inplace=True)
-        logger.info(f"Filtered to {len(asal_gdf)} ASAL sub-counties")
+        asal_gdf = asal_gdf.cx[
+            self.bbox["min_lng"]:self.bbox["max_lng"], self.bbox["min_lat"]:self.bbox["max_lat"]
+        ]
+        logger.info(f"Filtered to {len(asal_gdf)} ASAL sub-counties in {self.region['name']}")
         return asal_gdf
 
     def extract_boundary_data(
@@ -101,8 +106,7 @@ class KenyaBoundaryLoader:
         return uploaded
 
     def get_boundaries_from_db(self) -> list[dict]:
-        result = self.supabase.table("asal_admin3_boundaries").select("*").execute()
-        return result.data
+        return get_admin3_boundaries()
 
     def process_admin3_shapefile(
         self,
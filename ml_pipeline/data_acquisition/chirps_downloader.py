@@ -6,6 +6,7 @@ from pathlib import Path
 from typing import Optional
 from tqdm import tqdm
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
@@ -13,22 +14,39 @@ from config import (
     CHIRPS_MONTHLY_URL,
     CHIRPS_DEKADAL_URL,
     RASTER_DIR,
-    KENYA_ASAL_BBOX,
+    ARCHIVE_CONFIG,
 )
-from db.supabase_client import get_supabase_client
+from db.supabase_client import get_raster_status_counts, save_raster_metadata
+from regions import get_region
+import instrumentation
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+COG_PREDICTORS = {1: "NO", 2: "STANDARD", 3: "FLOATING_POINT"}
+
 
 class CHIRPSDownloader:
-    def __init__(self):
-        self.supabase = get_supabase_client()
+    def __init__(
+        self,
+        region: Optional[str | dict] = None,
+        cog: Optional[bool] = None,
+        keep_source: Optional[bool] = None,
+    ):
         self.monthly_dir = RASTER_DIR / "monthly"
         self.dekadal_dir = RASTER_DIR / "dekadal"
         self.monthly_dir.mkdir(parents=True, exist_ok=True)
         self.dekadal_dir.mkdir(parents=True, exist_ok=True)
 
+        self.region = get_region(region)
+        self.bbox = self.region["bbox"]
+        self.cog = ARCHIVE_CONFIG["cog"] if cog is None else cog
+        self.keep_source = ARCHIVE_CONFIG["keep_source"] if keep_source is None else keep_source
+        self.archive_dir = RASTER_DIR / "cog" / self.region["key"]
+
+    def _get_archive_path(self, data_type: str, filename: str) -> Path:
+        return self.archive_dir / data_type / filename
+
     def _get_monthly_filename(self, year: int, month: int) -> str:
         return f"chirps-v2.0.{year}.{month:02d}.tif"
 
@@ -104,9 +122,12 @@ class CHIRPSDownloader:
         filepath: Path,
         source_url: str,
         status: str,
+        source_path: Optional[Path] = None,
+        derived_from: Optional[list[str]] = None,
     ):
         file_size = filepath.stat().st_size if filepath.exists() else None
         checksum = self._calculate_md5(filepath) if filepath.exists() and status == "completed" else None
+        is_archive = source_path is not None and source_path != filepath
 
         record = {
             "data_type": data_type,
@@ -116,110 +137,301 @@ class CHIRPSDownloader:
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat(),
             "resolution_deg": 0.05,
-            "min_lat": KENYA_ASAL_BBOX["min_lat"],
-            "max_lat": KENYA_ASAL_BBOX["max_lat"],
-            "min_lng": KENYA_ASAL_BBOX["min_lng"],
-            "max_lng": KENYA_ASAL_BBOX["max_lng"],
+            "min_lat": self.bbox["min_lat"],
+            "max_lat": self.bbox["max_lat"],
+            "min_lng": self.bbox["min_lng"],
+            "max_lng": self.bbox["max_lng"],
             "file_path": str(filepath) if filepath.exists() else None,
             "file_size_bytes": file_size,
             "checksum": checksum,
             "source_url": source_url,
             "download_status": status,
             "processed": False,
+            "archive_format": "cog" if self.archive_dir in filepath.parents else "source",
         }
 
-        existing = (
-            self.supabase.table("chirps_raster_metadata")
-            .select("id")
-            .eq("data_type", data_type)
-            .eq("year", year)
-            .eq("month", month)
-        )
-
-        if dekad is not None:
-            existing = existing.eq("dekad", dekad)
+        if is_archive and source_path.exists():
+            record.update({
+                "source_file_path": str(source_path),
+                "source_file_size_bytes": source_path.stat().st_size,
+                "source_checksum": self._calculate_md5(source_path),
+            })
+        elif is_archive and status == "completed":
+            record["source_file_path"] = None
+        if derived_from is not None:
+            record["derived_from"] = derived_from
+
+        save_raster_metadata(record)
+
+    def _write_raster(self, path: Path, data, profile: dict, cog: bool):
+        import rasterio
+        from rasterio.io import MemoryFile
+        from rasterio.shutil import copy as copy_raster
+
+        compress = ARCHIVE_CONFIG["compress"]
+        level = ARCHIVE_CONFIG["level"]
+        if cog:
+            options = {
+                "compress": compress,
+                "predictor": COG_PREDICTORS[ARCHIVE_CONFIG["predictor"]],
+                "blocksize": ARCHIVE_CONFIG["blocksize"],
+            }
+            if level is not None:
+                options["level"] = level
         else:
-            existing = existing.is_("dekad", "null")
+            options = {
+                "compress": compress,
+                "predictor": ARCHIVE_CONFIG["predictor"],
+                "tiled": True,
+                "blockxsize": ARCHIVE_CONFIG["blocksize"],
+                "blockysize": ARCHIVE_CONFIG["blocksize"],
+            }
+            if level is not None:
+                options["zstd_level" if compress == "ZSTD" else "zlevel"] = level
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial_path = path.with_name(path.name + ".part")
+        try:
+            if cog:
+                with MemoryFile() as memfile:
+                    with memfile.open(**profile) as staged:
+                        staged.write(data, 1)
+                    with memfile.open() as staged:
+                        copy_raster(staged, partial_path, driver="COG", **options)
+            else:
+                with rasterio.open(partial_path, "w", **profile, **options) as dst:
+                    dst.write(data, 1)
+            partial_path.replace(path)
+        finally:
+            if partial_path.exists():
+                partial_path.unlink()
+
+    def convert_to_cog(self, source_path: Path, archive_path: Path) -> bool:
+        import rasterio
+        from rasterio.errors import RasterioError
+        from rasterio.windows import Window
+        from preprocessing.tiling import bbox_window
 
-        result = existing.maybeSingle().execute()
+        try:
+            with instrumentation.timer("cog_convert"):
+                with rasterio.open(source_path) as src:
+                    row_off, col_off, height, width = bbox_window(src, self.bbox)
+                    window = Window(col_off, row_off, width, height)
+                    data = src.read(1, window=window)
+                    profile = {
+                        "driver": "GTiff",
+                        "dtype": data.dtype.name,
+                        "count": 1,
+                        "height": height,
+                        "width": width,
+                        "crs": src.crs,
+                        "transform": src.window_transform(window),
+                        "nodata": src.nodata if src.nodata is not None else -9999,
+                    }
+                self._write_raster(archive_path, data, profile, cog=True)
+        except (RasterioError, OSError) as e:
+            logger.error(f"Failed to convert {source_path.name} to COG: {e}")
+            return False
 
-        if result.data:
-            self.supabase.table("chirps_raster_metadata").update(record).eq(
-                "id", result.data["id"]
-            ).execute()
-        else:
-            self.supabase.table("chirps_raster_metadata").insert(record).execute()
+        source_size = source_path.stat().st_size
+        archive_size = archive_path.stat().st_size
+        instrumentation.count("cog_bytes_saved", source_size - archive_size)
+        logger.info(
+            f"Archived {archive_path.name} for {self.region['name']}: "
+            f"{source_size / 1e6:.1f} MB -> {archive_size / 1e6:.2f} MB"
+        )
+        return True
 
-    def download_monthly(self, year: int, month: int, force: bool = False) -> bool:
-        filename = self._get_monthly_filename(year, month)
-        filepath = self.monthly_dir / filename
-        url = self._get_monthly_url(year, month)
-        start_date, end_date = self._get_month_dates(year, month)
+    def _download_period(
+        self,
+        data_type: str,
+        year: int,
+        month: int,
+        dekad: Optional[int],
+        filename: str,
+        url: str,
+        force: bool,
+    ) -> bool:
+        source_path = (self.monthly_dir if data_type == "monthly" else self.dekadal_dir) / filename
+        archive_path = self._get_archive_path(data_type, filename) if self.cog else None
+        filepath = archive_path or source_path
+        if dekad is None:
+            start_date, end_date = self._get_month_dates(year, month)
+        else:
+            start_date, end_date = self._get_dekad_dates(year, month, dekad)
+        period = (data_type, year, month, dekad, start_date, end_date)
 
         if filepath.exists() and not force:
-            logger.info(f"Monthly file already exists: {filename}")
-            self._record_metadata(
-                "monthly", year, month, None, start_date, end_date, filepath, url, "completed"
-            )
+            logger.info(f"{data_type.capitalize()} file already exists: {filepath.name}")
+            self._record_metadata(*period, filepath, url, "completed", source_path)
             return True
 
-        self._record_metadata(
-            "monthly", year, month, None, start_date, end_date, filepath, url, "downloading"
-        )
+        if archive_path is not None and source_path.exists() and not force:
+            success = self.convert_to_cog(source_path, archive_path)
+        else:
+            self._record_metadata(*period, source_path, url, "downloading")
 
-        logger.info(f"Downloading monthly CHIRPS: {filename}")
-        success = self._download_file(url, filepath)
+            logger.info(f"Downloading {data_type} CHIRPS: {filename}")
+            success = self._download_file(url, source_path)
+            if success and archive_path is not None:
+                success = self.convert_to_cog(source_path, archive_path)
 
         status = "completed" if success else "failed"
-        self._record_metadata(
-            "monthly", year, month, None, start_date, end_date, filepath, url, status
-        )
+        self._record_metadata(*period, filepath, url, status, source_path)
+
+        if success and archive_path is not None and not self.keep_source:
+            source_path.unlink()
+            save_raster_metadata(
+                {"data_type": data_type, "year": year, "month": month, "dekad": dekad,
+                 "source_file_path": None}
+            )
 
         return success
 
+    def download_monthly(self, year: int, month: int, force: bool = False) -> bool:
+        filename = self._get_monthly_filename(year, month)
+        url = self._get_monthly_url(year, month)
+        return self._download_period("monthly", year, month, None, filename, url, force)
+
     def download_dekadal(self, year: int, month: int, dekad: int, force: bool = False) -> bool:
         if dekad not in [1, 2, 3]:
             raise ValueError("Dekad must be 1, 2, or 3")
 
         filename = self._get_dekadal_filename(year, month, dekad)
-        filepath = self.dekadal_dir / filename
         url = self._get_dekadal_url(year, month, dekad)
-        start_date, end_date = self._get_dekad_dates(year, month, dekad)
+        return self._download_period("dekadal", year, month, dekad, filename, url, force)
+
+    def _dekadal_path(self, year: int, month: int, dekad: int) -> Path:
+        filename = self._get_dekadal_filename(year, month, dekad)
+        if self.cog:
+            return self._get_archive_path("dekadal", filename)
+        return self.dekadal_dir / filename
+
+    def derive_monthly(self, year: int, month: int, force: bool = False) -> bool:
+        import numpy as np
+        import rasterio
+        from rasterio.errors import RasterioError
+
+        filename = self._get_monthly_filename(year, month)
+        url = self._get_monthly_url(year, month)
+        source_path = self.monthly_dir / filename
+        filepath = self._get_archive_path("monthly", filename) if self.cog else source_path
+        start_date, end_date = self._get_month_dates(year, month)
+        period = ("monthly", year, month, None, start_date, end_date)
 
         if filepath.exists() and not force:
-            logger.info(f"Dekadal file already exists: {filename}")
-            self._record_metadata(
-                "dekadal", year, month, dekad, start_date, end_date, filepath, url, "completed"
-            )
+            logger.info(f"Monthly file already exists: {filepath.name}")
             return True
 
-        self._record_metadata(
-            "dekadal", year, month, dekad, start_date, end_date, filepath, url, "downloading"
-        )
+        dekad_paths = [self._dekadal_path(year, month, dekad) for dekad in range(1, 4)]
+        missing = [path.name for path in dekad_paths if not path.exists()]
+        if missing:
+            logger.error(f"Cannot derive {filename}: missing dekads {missing}")
+            return False
 
-        logger.info(f"Downloading dekadal CHIRPS: {filename}")
-        success = self._download_file(url, filepath)
+        try:
+            with instrumentation.timer("derive_monthly"):
+                stack = []
+                for path in dekad_paths:
+                    with rasterio.open(path) as src:
+                        if stack and (src.shape != stack[0].shape or src.transform != transform):
+                            raise ValueError(f"{path.name} is not on the same grid as its month")
+                        stack.append(src.read(1))
+                        transform = src.transform
+                        profile = {
+                            "driver": "GTiff",
+                            "dtype": "float32",
+                            "count": 1,
+                            "height": src.height,
+                            "width": src.width,
+                            "crs": src.crs,
+                            "transform": src.transform,
+                            "nodata": -9999,
+                        }
+
+                dekads = np.stack(stack).astype(np.float32)
+                total = dekads.sum(axis=0)
+                total[~(dekads >= 0).all(axis=0)] = -9999
+                self._write_raster(filepath, total, profile, cog=self.cog)
+        except (RasterioError, OSError, ValueError) as e:
+            logger.error(f"Failed to derive {filename} from dekads: {e}")
+            self._record_metadata(*period, filepath, url, "failed")
+            return False
 
-        status = "completed" if success else "failed"
+        logger.info(f"Derived {filename} from {len(dekad_paths)} dekads")
+        instrumentation.count("monthly_derived")
         self._record_metadata(
-            "dekadal", year, month, dekad, start_date, end_date, filepath, url, status
+            *period, filepath, url, "completed",
+            derived_from=[path.name for path in dekad_paths],
         )
+        return True
 
-        return success
+    def derive_monthly_periods(
+        self,
+        periods: list[tuple[int, int]],
+        force: bool = False,
+        workers: int = 1,
+    ) -> dict:
+        dekadal = self.download_periods(periods, "dekadal", False, workers)
+        fetched = {
+            f"{year}-{month:02d}": all(dekadal[f"{year}-{month:02d}-d{d}"] for d in range(1, 4))
+            for year, month in periods
+        }
+
+        tasks = {
+            key: (year, month)
+            for key, (year, month) in zip(fetched, periods)
+            if fetched[key]
+        }
+        results = {key: False for key, ok in fetched.items() if not ok}
+
+        if workers <= 1:
+            results.update(
+                {key: self.derive_monthly(*period, force) for key, period in tasks.items()}
+            )
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    key: executor.submit(self.derive_monthly, *period, force)
+                    for key, period in tasks.items()
+                }
+                results.update({key: future.result() for key, future in futures.items()})
+
+        return dict(sorted(results.items()))
+
+    def download_periods(
+        self,
+        periods: list[tuple[int, int]],
+        data_type: str = "monthly",
+        force: bool = False,
+        workers: int = 1,
+    ) -> dict:
+        if data_type == "monthly":
+            tasks = {
+                f"{year}-{month:02d}": (self.download_monthly, (year, month, force))
+                for year, month in periods
+            }
+        else:
+            tasks = {
+                f"{year}-{month:02d}-d{dekad}": (
+                    self.download_dekadal, (year, month, dekad, force)
+                )
+                for year, month in periods
+                for dekad in range(1, 4)
+            }
+
+        if workers <= 1:
+            return {key: fn(*args) for key, (fn, args) in tasks.items()}
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {key: executor.submit(fn, *args) for key, (fn, args) in tasks.items()}
+            return {key: future.result() for key, future in futures.items()}
 
     def download_year_monthly(self, year: int, force: bool = False) -> dict:
-        results = {}
-        for month in range(1, 13):
-            results[f"{year}-{month:02d}"] = self.download_monthly(year, month, force)
-        return results
+        return self.download_periods([(year, m) for m in range(1, 13)], "monthly", force)
 
     def download_year_dekadal(self, year: int, force: bool = False) -> dict:
-        results = {}
-        for month in range(1, 13):
-            for dekad in range(1, 4):
-                key = f"{year}-{month:02d}-d{dekad}"
-                results[key] = self.download_dekadal(year, month, dekad, force)
-        return results
+        return self.download_periods([(year, m) for m in range(1, 13)], "dekadal", force)
 
     def download_range(
         self,
@@ -227,33 +439,18 @@ class CHIRPSDownloader:
         end_year: int,
         data_type: str = "monthly",
         force: bool = False,
+        workers: int = 1,
     ) -> dict:
-        all_results = {}
-        for year in range(start_year, end_year + 1):
-            logger.info(f"Downloading {data_type} data for {year}")
-            if data_type == "monthly":
-                results = self.download_year_monthly(year, force)
-            else:
-                results = self.download_year_dekadal(year, force)
-            all_results.update(results)
-        return all_results
+        periods = [
+            (year, month)
+            for year in range(start_year, end_year + 1)
+            for month in range(1, 13)
+        ]
+        logger.info(f"Downloading {data_type} data for {start_year}-{end_year}")
+        return self.download_periods(periods, data_type, force, workers)
 
     def get_download_status(self) -> dict:
-        result = (
-            self.supabase.table("chirps_raster_metadata")
-            .select("data_type, download_status, count")
-            .execute()
-        )
-
-        status_counts = {"monthly": {}, "dekadal": {}}
-        for row in result.data:
-            dtype = row["data_type"]
-            status = row["download_status"]
-            if status not in status_counts[dtype]:
-                status_counts[dtype][status] = 0
-            status_counts[dtype][status] += 1
-
-        return status_counts
+        return get_raster_status_counts()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,235 @@
+import logging
+import shutil
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import PROCESSED_DIR, CNN_CONFIG
+from db.supabase_client import get_cnn_features
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ["subcounty_code", "feature_date", "model_version"]
+PARTITION_COLUMNS = ["model_version", "year"]
+
+
+def _as_date(value) -> date:
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+class LocalFeatureStore:
+    def __init__(self, root: Optional[Path] = None, feature_dim: Optional[int] = None):
+        if root is None:
+            root = PROCESSED_DIR / "feature_store"
+        if feature_dim is None:
+            feature_dim = CNN_CONFIG["feature_dim"]
+
+        previous = root.with_name(f"{root.name}.previous")
+        if previous.exists() and not root.exists():
+            logger.warning(f"Restoring feature store from interrupted compaction: {previous}")
+            previous.rename(root)
+
+        root.mkdir(parents=True, exist_ok=True)
+        self.root = root
+        self.feature_dim = feature_dim
+
+    def _schema(self) -> pa.Schema:
+        return pa.schema(
+            [
+                ("subcounty_code", pa.string()),
+                ("feature_date", pa.date32()),
+                ("model_version", pa.string()),
+                ("year", pa.int16()),
+                ("feature_vector", pa.list_(pa.float32(), self.feature_dim)),
+                ("cumulative_precip_mm", pa.float64()),
+                ("precip_anomaly_pct", pa.float64()),
+                ("spi_1month", pa.float64()),
+                ("spi_3month", pa.float64()),
+                ("spi_6month", pa.float64()),
+                ("consecutive_dry_dekads", pa.int32()),
+                ("rainy_season_onset_anomaly_days", pa.int32()),
+                ("spatial_cv", pa.float64()),
+                ("precip_trend_slope", pa.float64()),
+                ("pct_below_normal", pa.float64()),
+                ("drought_severity_index", pa.float64()),
+                ("written_at", pa.timestamp("us")),
+            ]
+        )
+
+    def _to_table(self, features_rows: list[dict]) -> pa.Table:
+        schema = self._schema()
+        written_at = datetime.now()
+
+        vectors = np.stack(
+            [np.asarray(row["feature_vector"], dtype=np.float32) for row in features_rows]
+        )
+        if vectors.shape[1] != self.feature_dim:
+            raise ValueError(
+                f"Expected {self.feature_dim}-d feature vectors, got {vectors.shape[1]}"
+            )
+
+        feature_dates = [_as_date(row["feature_date"]) for row in features_rows]
+        derived = {
+            "feature_date": pa.array(feature_dates, type=pa.date32()),
+            "year": pa.array([d.year for d in feature_dates], type=pa.int16()),
+            "feature_vector": pa.FixedSizeListArray.from_arrays(
+                pa.array(vectors.ravel(), type=pa.float32()), self.feature_dim
+            ),
+            "written_at": pa.array([written_at] * len(features_rows), type=pa.timestamp("us")),
+        }
+
+        arrays = [
+            derived[field.name] if field.name in derived
+            else pa.array(
+                [row.get(field.name) for row in features_rows],
+                type=field.type,
+                from_pandas=True,
+            )
+            for field in schema
+        ]
+
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def write(self, features_rows: list[dict]) -> int:
+        if not features_rows:
+            return 0
+
+        table = self._to_table(features_rows)
+        pq.write_to_dataset(
+            table,
+            root_path=str(self.root),
+            partition_cols=PARTITION_COLUMNS,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        )
+
+        logger.debug(f"Wrote {len(features_rows)} feature rows to {self.root}")
+        return len(features_rows)
+
+    def _dataset(self) -> Optional[ds.Dataset]:
+        if not any(self.root.rglob("*.parquet")):
+            return None
+
+        return ds.dataset(
+            str(self.root),
+            format="parquet",
+            partitioning=ds.partitioning(
+                pa.schema([("model_version", pa.string()), ("year", pa.int16())]),
+                flavor="hive",
+            ),
+        )
+
+    def query(
+        self,
+        subcounty_code: Optional[str | list[str]] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        model_version: Optional[str] = None,
+        columns: Optional[list[str]] = None,
+    ) -> pd.DataFrame:
+        dataset = self._dataset()
+        if dataset is None:
+            return pd.DataFrame(columns=columns or self._schema().names)
+
+        expression = None
+
+        def _and(condition):
+            return condition if expression is None else expression & condition
+
+        if model_version is not None:
+            expression = _and(ds.field("model_version") == model_version)
+        if subcounty_code is not None:
+            codes = [subcounty_code] if isinstance(subcounty_code, str) else list(subcounty_code)
+            expression = _and(ds.field("subcounty_code").isin(codes))
+        if start_date is not None:
+            start_date = _as_date(start_date)
+            expression = _and(ds.field("year") >= start_date.year)
+            expression = _and(ds.field("feature_date") >= pa.scalar(start_date, pa.date32()))
+        if end_date is not None:
+            end_date = _as_date(end_date)
+            expression = _and(ds.field("year") <= end_date.year)
+            expression = _and(ds.field("feature_date") <= pa.scalar(end_date, pa.date32()))
+
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys(columns + KEY_COLUMNS + ["written_at"]))
+
+        frame = dataset.to_table(columns=read_columns, filter=expression).to_pandas()
+
+        frame = (
+            frame.sort_values("written_at")
+            .drop_duplicates(subset=KEY_COLUMNS, keep="last")
+            .sort_values(["feature_date", "subcounty_code"])
+            .reset_index(drop=True)
+        )
+
+        if columns is not None:
+            frame = frame[columns]
+
+        return frame
+
+    def feature_matrix(
+        self,
+        subcounty_code: Optional[str | list[str]] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        model_version: Optional[str] = None,
+    ) -> tuple[pd.DataFrame, np.ndarray]:
+        frame = self.query(
+            subcounty_code=subcounty_code,
+            start_date=start_date,
+            end_date=end_date,
+            model_version=model_version,
+            columns=KEY_COLUMNS + ["feature_vector"],
+        )
+
+        if frame.empty:
+            return frame, np.empty((0, self.feature_dim), dtype=np.float32)
+
+        matrix = np.stack(frame.pop("feature_vector").to_numpy()).astype(np.float32, copy=False)
+        return frame, matrix
+
+    def compact(self):
+        frame = self.query()
+        if frame.empty:
+            return
+
+        staging = self.root.with_name(f"{self.root.name}.compacting")
+        if staging.exists():
+            shutil.rmtree(staging)
+
+        compacted = LocalFeatureStore(staging, self.feature_dim)
+        compacted.write(frame.to_dict("records"))
+
+        previous = self.root.with_name(f"{self.root.name}.previous")
+        if previous.exists():
+            shutil.rmtree(previous)
+
+        self.root.rename(previous)
+        staging.rename(self.root)
+        shutil.rmtree(previous)
+
+        logger.info(f"Compacted feature store to {len(frame)} rows")
+
+    def sync_from_supabase(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> int:
+        rows = get_cnn_features(start_date=start_date, end_date=end_date)
+        rows = [r for r in rows if len(r.get("feature_vector", [])) == self.feature_dim]
+
+        written = self.write(rows)
+        logger.info(f"Synced {written} feature rows from Supabase into {self.root}")
+        return written
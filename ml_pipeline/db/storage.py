@@ -0,0 +1,480 @@
+import json
+import logging
+import re
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import LOCAL_DB_PATH, MIGRATIONS_DIR, STORAGE_BACKEND
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_TABLES = (
+    "asal_admin3_boundaries",
+    "chirps_raster_metadata",
+    "cnn_extracted_features",
+    "hunger_predictions",
+    "ipc_historical_data",
+)
+
+TABLE_CONSTRAINT = re.compile(r"(UNIQUE|CHECK|PRIMARY|FOREIGN|CONSTRAINT)\b", re.IGNORECASE)
+
+FILTER_OPS = ("eq", "gte", "lte", "in", "is_null", "not_null")
+
+Filter = tuple[str, str, object]
+
+
+class StorageBackend(ABC):
+    name = "base"
+
+    def select(
+        self,
+        table: str,
+        columns: str | Sequence[str] = "*",
+        filters: Iterable[Filter] = (),
+        order: Optional[str] = None,
+        desc: bool = False,
+        limit: Optional[int] = None,
+    ) -> list[dict]:
+        with instrumentation.timer("db_roundtrip", table=table, operation="select"):
+            return self._select(table, columns, list(filters), order, desc, limit)
+
+    def insert(self, table: str, rows: list[dict]) -> list[dict]:
+        if not rows:
+            return []
+        with instrumentation.timer("db_roundtrip", table=table, operation="insert"):
+            result = self._insert(table, rows)
+        instrumentation.count("db_rows_written", len(rows), table=table, operation="insert")
+        return result
+
+    def upsert(self, table: str, rows: list[dict], on_conflict: Sequence[str]) -> list[dict]:
+        if not rows:
+            return []
+        with instrumentation.timer("db_roundtrip", table=table, operation="upsert"):
+            result = self._upsert(table, rows, list(on_conflict))
+        instrumentation.count("db_rows_written", len(rows), table=table, operation="upsert")
+        return result
+
+    def update(self, table: str, values: dict, filters: Iterable[Filter]) -> list[dict]:
+        with instrumentation.timer("db_roundtrip", table=table, operation="update"):
+            result = self._update(table, values, list(filters))
+        instrumentation.count("db_rows_written", len(result), table=table, operation="update")
+        return result
+
+    def delete(self, table: str, filters: Iterable[Filter] = ()) -> int:
+        with instrumentation.timer("db_roundtrip", table=table, operation="delete"):
+            return self._delete(table, list(filters))
+
+    @abstractmethod
+    def _select(self, table, columns, filters, order, desc, limit) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def _insert(self, table, rows) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def _upsert(self, table, rows, on_conflict) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def _update(self, table, values, filters) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def _delete(self, table, filters) -> int:
+        ...
+
+
+def _column_list(columns: str | Sequence[str]) -> list[str]:
+    if isinstance(columns, str):
+        columns = [c.strip() for c in columns.split(",")]
+    return [c for c in columns if c and c != "*"]
+
+
+class SupabaseBackend(StorageBackend):
+    name = "supabase"
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from db.supabase_client import get_supabase_client
+            self._client = get_supabase_client()
+        return self._client
+
+    @staticmethod
+    def _apply_filters(query, filters: list[Filter]):
+        for column, op, value in filters:
+            if op == "eq":
+                query = query.is_(column, "null") if value is None else query.eq(column, value)
+            elif op == "gte":
+                query = query.gte(column, value)
+            elif op == "lte":
+                query = query.lte(column, value)
+            elif op == "in":
+                query = query.in_(column, list(value))
+            elif op == "is_null":
+                query = query.is_(column, "null")
+            elif op == "not_null":
+                query = query.not_.is_(column, "null")
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+        return query
+
+    def _select(self, table, columns, filters, order, desc, limit):
+        names = _column_list(columns)
+        query = self.client.table(table).select(",".join(names) if names else "*")
+        query = self._apply_filters(query, filters)
+        if order:
+            query = query.order(order, desc=desc)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.execute().data
+
+    def _insert(self, table, rows):
+        return self.client.table(table).insert(rows).execute().data
+
+    def _upsert(self, table, rows, on_conflict):
+        return (
+            self.client.table(table)
+            .upsert(rows, on_conflict=",".join(on_conflict))
+            .execute()
+            .data
+        )
+
+    def _update(self, table, values, filters):
+        query = self._apply_filters(self.client.table(table).update(values), filters)
+        return query.execute().data
+
+    def _delete(self, table, filters):
+        query = self._apply_filters(self.client.table(table).delete(), filters)
+        return len(query.execute().data)
+
+
+SQLITE_TYPES = {
+    "uuid": "TEXT",
+    "text": "TEXT",
+    "date": "TEXT",
+    "timestamptz": "TEXT",
+    "jsonb": "TEXT",
+    "json": "TEXT",
+    "integer": "INTEGER",
+    "smallint": "INTEGER",
+    "bigint": "INTEGER",
+    "boolean": "INTEGER",
+    "decimal": "REAL",
+    "numeric": "REAL",
+    "real": "REAL",
+}
+
+JSON_TYPES = ("jsonb", "json")
+
+
+def _split_top_level(body: str) -> list[str]:
+    parts, depth, current = [], 0, []
+    for char in body:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+
+def _translate_column(definition: str) -> tuple[str, str, str]:
+    match = re.match(r"(\w+)\s+(\w+)(\s*\([^)]*\))?(.*)$", definition, re.DOTALL)
+    if match is None:
+        raise ValueError(f"Cannot parse column definition: {definition}")
+
+    name, pg_type, _, rest = match.groups()
+    pg_type = pg_type.lower()
+    if pg_type not in SQLITE_TYPES:
+        raise ValueError(f"Unsupported column type {pg_type} for {name}")
+
+    rest = re.sub(r"\s*DEFAULT gen_random_uuid\(\)", "", rest, flags=re.IGNORECASE)
+    rest = re.sub(r"DEFAULT now\(\)", "DEFAULT CURRENT_TIMESTAMP", rest, flags=re.IGNORECASE)
+    rest = re.sub(r"('[^']*')::jsonb?", r"\1", rest)
+    rest = re.sub(r"DEFAULT false\b", "DEFAULT 0", rest, flags=re.IGNORECASE)
+    rest = re.sub(r"DEFAULT true\b", "DEFAULT 1", rest, flags=re.IGNORECASE)
+
+    return name, pg_type, f"{name} {SQLITE_TYPES[pg_type]}{rest}"
+
+
+def translate_migrations(
+    migrations_dir: Optional[Path] = None,
+    tables: Sequence[str] = PIPELINE_TABLES,
+) -> tuple[list[str], list[tuple[str, str, str]], dict[str, dict[str, str]]]:
+    if migrations_dir is None:
+        migrations_dir = MIGRATIONS_DIR
+
+    statements = []
+    added_columns = []
+    column_types: dict[str, dict[str, str]] = {}
+
+    for path in sorted(migrations_dir.glob("*.sql")):
+        sql = re.sub(r"/\*.*?\*/", "", path.read_text(), flags=re.DOTALL)
+        sql = re.sub(r"--[^\n]*", "", sql)
+
+        for statement in sql.split(";"):
+            statement = statement.strip()
+
+            match = re.match(
+                r"CREATE TABLE IF NOT EXISTS (\w+)\s*\((.*)\)$", statement, re.DOTALL
+            )
+            if match and match.group(1) in tables:
+                table, body = match.groups()
+                types = column_types.setdefault(table, {})
+                definitions = []
+                for item in _split_top_level(body):
+                    if TABLE_CONSTRAINT.match(item):
+                        definitions.append(item)
+                        continue
+                    name, pg_type, definition = _translate_column(item)
+                    types[name] = pg_type
+                    definitions.append(definition)
+                statements.append(
+                    f"CREATE TABLE IF NOT EXISTS {table} (\n  "
+                    + ",\n  ".join(definitions)
+                    + "\n)"
+                )
+                continue
+
+            match = re.match(
+                r"CREATE (UNIQUE )?INDEX IF NOT EXISTS \w+ ON (\w+)\s*\(", statement
+            )
+            if match and match.group(2) in tables and " USING " not in statement.upper():
+                statements.append(statement)
+                continue
+
+            match = re.match(r"ALTER TABLE (\w+)\s+(ADD COLUMN.*)$", statement, re.DOTALL)
+            if match and match.group(1) in tables:
+                table = match.group(1)
+                for clause in _split_top_level(match.group(2)):
+                    clause = re.sub(
+                        r"^ADD COLUMN (IF NOT EXISTS )?", "", clause, flags=re.IGNORECASE
+                    )
+                    name, pg_type, definition = _translate_column(clause)
+                    column_types.setdefault(table, {})[name] = pg_type
+                    added_columns.append((table, name, definition))
+
+    missing = set(tables) - set(column_types)
+    if missing:
+        raise ValueError(f"No migrations found for tables: {sorted(missing)}")
+
+    return statements, added_columns, column_types
+
+
+class SQLiteBackend(StorageBackend):
+    name = "sqlite"
+
+    def __init__(self, path: Optional[Path] = None, migrations_dir: Optional[Path] = None):
+        if path is None:
+            path = LOCAL_DB_PATH
+
+        if str(path) != ":memory:":
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+
+        statements, added_columns, self.column_types = translate_migrations(migrations_dir)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if str(path) != ":memory:":
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+
+        with self.conn:
+            for statement in statements:
+                self.conn.execute(statement)
+            for table, name, definition in added_columns:
+                existing = {row["name"] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+                if name not in existing:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {definition}")
+
+    def close(self):
+        self.conn.close()
+
+    def _columns(self, table: str) -> dict[str, str]:
+        types = self.column_types.get(table)
+        if types is None:
+            raise ValueError(f"Unknown table: {table}")
+        return types
+
+    def _to_sql(self, table: str, column: str, value):
+        if value is None:
+            return None
+        if self._columns(table).get(column) in JSON_TYPES:
+            return json.dumps(value, default=_json_default)
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        if hasattr(value, "item"):
+            return value.item()
+        return value
+
+    def _from_sql(self, table: str, row: sqlite3.Row) -> dict:
+        types = self._columns(table)
+        record = dict(row)
+        for column, value in record.items():
+            if value is None:
+                continue
+            pg_type = types.get(column)
+            if pg_type in JSON_TYPES:
+                record[column] = json.loads(value)
+            elif pg_type == "boolean":
+                record[column] = bool(value)
+        return record
+
+    def _where(self, table: str, filters: list[Filter]) -> tuple[str, list]:
+        types = self._columns(table)
+        clauses, params = [], []
+
+        for column, op, value in filters:
+            if column not in types:
+                raise ValueError(f"Unknown column {column} for {table}")
+            if op == "eq" and value is None or op == "is_null":
+                clauses.append(f"{column} IS NULL")
+            elif op == "not_null":
+                clauses.append(f"{column} IS NOT NULL")
+            elif op == "in":
+                values = list(value)
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(self._to_sql(table, column, v) for v in values)
+            elif op in ("eq", "gte", "lte"):
+                operator = {"eq": "=", "gte": ">=", "lte": "<="}[op]
+                clauses.append(f"{column} {operator} ?")
+                params.append(self._to_sql(table, column, value))
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _prepare_rows(self, table: str, rows: list[dict]) -> list[dict]:
+        types = self._columns(table)
+        prepared = []
+        for row in rows:
+            unknown = set(row) - set(types)
+            if unknown:
+                raise ValueError(f"Unknown columns for {table}: {sorted(unknown)}")
+            row = dict(row)
+            if types.get("id") == "uuid" and row.get("id") is None:
+                row["id"] = str(uuid.uuid4())
+            prepared.append(row)
+        return prepared
+
+    def _write(self, table: str, rows: list[dict], conflict_clause) -> list[dict]:
+        written = []
+        with self._lock, self.conn:
+            for row in self._prepare_rows(table, rows):
+                columns = list(row)
+                sql = (
+                    f"INSERT INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})"
+                    f"{conflict_clause(columns)} RETURNING *"
+                )
+                params = [self._to_sql(table, c, row[c]) for c in columns]
+                written.extend(self.conn.execute(sql, params).fetchall())
+        return [self._from_sql(table, row) for row in written]
+
+    def _select(self, table, columns, filters, order, desc, limit):
+        names = _column_list(columns)
+        unknown = set(names) - set(self._columns(table))
+        if unknown:
+            raise ValueError(f"Unknown columns for {table}: {sorted(unknown)}")
+        where, params = self._where(table, filters)
+        sql = f"SELECT {', '.join(names) if names else '*'} FROM {table}{where}"
+        if order:
+            if order not in self._columns(table):
+                raise ValueError(f"Unknown column {order} for {table}")
+            sql += f" ORDER BY {order} {'DESC' if desc else 'ASC'}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self._from_sql(table, row) for row in rows]
+
+    def _insert(self, table, rows):
+        return self._write(table, rows, lambda columns: "")
+
+    def _upsert(self, table, rows, on_conflict):
+        def conflict_clause(columns):
+            updates = [c for c in columns if c not in on_conflict and c != "id"]
+            if not updates:
+                return f" ON CONFLICT ({', '.join(on_conflict)}) DO NOTHING"
+            assignments = ", ".join(f"{c} = excluded.{c}" for c in updates)
+            return f" ON CONFLICT ({', '.join(on_conflict)}) DO UPDATE SET {assignments}"
+
+        return self._write(table, rows, conflict_clause)
+
+    def _update(self, table, values, filters):
+        if not values:
+            return []
+        self._prepare_rows(table, [values])
+        where, params = self._where(table, filters)
+        assignments = ", ".join(f"{c} = ?" for c in values)
+        sql = f"UPDATE {table} SET {assignments}{where} RETURNING *"
+        values_params = [self._to_sql(table, c, v) for c, v in values.items()]
+
+        with self._lock, self.conn:
+            rows = self.conn.execute(sql, values_params + params).fetchall()
+        return [self._from_sql(table, row) for row in rows]
+
+    def _delete(self, table, filters):
+        where, params = self._where(table, filters)
+        with self._lock, self.conn:
+            return self.conn.execute(f"DELETE FROM {table}{where}", params).rowcount
+
+
+def _json_default(value):
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def create_storage(backend: Optional[str] = None) -> StorageBackend:
+    if backend is None:
+        backend = STORAGE_BACKEND
+
+    if backend == "supabase":
+        return SupabaseBackend()
+    if backend == "sqlite":
+        return SQLiteBackend()
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+        logger.info(f"Using {_storage.name} storage backend")
+    return _storage
+
+
+def set_storage(storage: StorageBackend) -> StorageBackend:
+    global _storage
+    _storage = storage
+    return storage
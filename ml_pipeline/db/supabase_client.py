@@ -1,46 +1,156 @@
-from supabase import create_client, Client
+import base64
+from collections import defaultdict
+
+import numpy as np
 import sys
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
 from config import SUPABASE_URL, SUPABASE_KEY
+from db.storage import get_storage
 
-_client: Client | None = None
+_client = None
 
 
-def get_supabase_client() -> Client:
+def get_supabase_client():
     global _client
     if _client is None:
         if not SUPABASE_URL or not SUPABASE_KEY:
             raise ValueError(
                 "SUPABASE_URL and SUPABASE_KEY must be set in environment variables"
             )
+        from supabase import create_client
         _client = create_client(SUPABASE_URL, SUPABASE_KEY)
     return _client
 
 
 def insert_admin3_boundary(boundary_data: dict) -> dict:
-    client = get_supabase_client()
-    result = client.table("asal_admin3_boundaries").insert(boundary_data).execute()
-    return result.data[0] if result.data else {}
+    result = get_storage().insert("asal_admin3_boundaries", [boundary_data])
+    return result[0] if result else {}
 
 
 def get_admin3_boundaries(county_code: str | None = None) -> list[dict]:
-    client = get_supabase_client()
-    query = client.table("asal_admin3_boundaries").select("*")
+    filters = []
     if county_code:
-        query = query.eq("county_code", county_code)
-    result = query.execute()
-    return result.data
+        filters.append(("county_code", "eq", county_code))
+    return get_storage().select("asal_admin3_boundaries", filters=filters)
+
+
+def get_raster_metadata(
+    data_type: str = "monthly",
+    start_date: str | None = None,
+    end_date: str | None = None,
+    download_status: str | None = "completed",
+) -> list[dict]:
+    filters = [("data_type", "eq", data_type)]
+    if download_status:
+        filters.append(("download_status", "eq", download_status))
+    if start_date:
+        filters.append(("start_date", "gte", start_date))
+    if end_date:
+        filters.append(("end_date", "lte", end_date))
+    return get_storage().select(
+        "chirps_raster_metadata", filters=filters, order="start_date"
+    )
+
+
+def save_raster_metadata(record: dict) -> dict:
+    storage = get_storage()
+    key = [
+        ("data_type", "eq", record["data_type"]),
+        ("year", "eq", record["year"]),
+        ("month", "eq", record["month"]),
+        ("dekad", "eq", record.get("dekad")),
+    ]
+    existing = storage.select("chirps_raster_metadata", "id", filters=key, limit=1)
+
+    if existing:
+        result = storage.update(
+            "chirps_raster_metadata", record, [("id", "eq", existing[0]["id"])]
+        )
+    else:
+        result = storage.insert("chirps_raster_metadata", [record])
+    return result[0] if result else {}
+
+
+def get_raster_status_counts() -> dict[str, dict[str, int]]:
+    rows = get_storage().select(
+        "chirps_raster_metadata", "data_type,download_status"
+    )
+    counts = {"monthly": defaultdict(int), "dekadal": defaultdict(int)}
+    for row in rows:
+        counts[row["data_type"]][row["download_status"]] += 1
+    return {data_type: dict(status) for data_type, status in counts.items()}
+
+
+FEATURE_VECTOR_DTYPE = np.dtype("<f4")
+
+
+def encode_feature_vector(vector) -> str:
+    data = np.ascontiguousarray(vector, dtype=FEATURE_VECTOR_DTYPE)
+    return base64.b64encode(data.tobytes()).decode("ascii")
+
+
+def decode_feature_vector(encoded: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(encoded), dtype=FEATURE_VECTOR_DTYPE)
+
+
+def _encode_feature_row(features_data: dict) -> dict:
+    if "feature_vector" not in features_data:
+        return features_data
+
+    row = {k: v for k, v in features_data.items() if k != "feature_vector"}
+    vector = np.asarray(features_data["feature_vector"], dtype=FEATURE_VECTOR_DTYPE)
+    row["feature_vector_f32"] = encode_feature_vector(vector)
+    row["feature_dim"] = int(vector.size)
+    return row
+
+
+def _decode_feature_row(row: dict) -> dict:
+    encoded = row.pop("feature_vector_f32", None)
+    if encoded:
+        row["feature_vector"] = decode_feature_vector(encoded)
+    elif "feature_vector" in row:
+        row["feature_vector"] = np.asarray(row["feature_vector"], dtype=np.float32)
+    return row
+
+
+FEATURE_CONFLICT = ("subcounty_code", "feature_date", "model_version")
+PREDICTION_CONFLICT = ("subcounty_code", "target_month", "model_version")
+IPC_CONFLICT = ("subcounty_code", "analysis_period_start", "analysis_period_end")
 
 
 def insert_cnn_features(features_data: dict) -> dict:
-    client = get_supabase_client()
-    result = client.table("cnn_extracted_features").upsert(
-        features_data,
-        on_conflict="subcounty_code,feature_date,model_version"
-    ).execute()
-    return result.data[0] if result.data else {}
+    result = get_storage().upsert(
+        "cnn_extracted_features", [_encode_feature_row(features_data)], FEATURE_CONFLICT
+    )
+    return result[0] if result else {}
+
+
+def insert_cnn_features_batch(features_rows: list[dict]) -> list[dict]:
+    return get_storage().upsert(
+        "cnn_extracted_features",
+        [_encode_feature_row(row) for row in features_rows],
+        FEATURE_CONFLICT,
+    )
+
+
+def _feature_filters(
+    subcounty_code: str | None,
+    start_date: str | None,
+    end_date: str | None,
+    model_version: str | None = None,
+) -> list[tuple]:
+    filters = []
+    if subcounty_code:
+        filters.append(("subcounty_code", "eq", subcounty_code))
+    if start_date:
+        filters.append(("feature_date", "gte", start_date))
+    if end_date:
+        filters.append(("feature_date", "lte", end_date))
+    if model_version:
+        filters.append(("model_version", "eq", model_version))
+    return filters
 
 
 def get_cnn_features(
@@ -48,25 +158,52 @@ def get_cnn_features(
     start_date: str | None = None,
     end_date: str | None = None,
 ) -> list[dict]:
-    client = get_supabase_client()
-    query = client.table("cnn_extracted_features").select("*")
-    if subcounty_code:
-        query = query.eq("subcounty_code", subcounty_code)
-    if start_date:
-        query = query.gte("feature_date", start_date)
-    if end_date:
-        query = query.lte("feature_date", end_date)
-    result = query.order("feature_date", desc=True).execute()
-    return result.data
+    rows = get_storage().select(
+        "cnn_extracted_features",
+        filters=_feature_filters(subcounty_code, start_date, end_date),
+        order="feature_date",
+        desc=True,
+    )
+    return [_decode_feature_row(row) for row in rows]
+
+
+def get_cnn_feature_matrix(
+    subcounty_code: str | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    model_version: str | None = None,
+) -> tuple[list[dict], np.ndarray]:
+    filters = _feature_filters(subcounty_code, start_date, end_date, model_version)
+    filters.append(("feature_vector_f32", "not_null", None))
+    rows = get_storage().select(
+        "cnn_extracted_features",
+        "subcounty_code,feature_date,model_version,feature_dim,feature_vector_f32",
+        filters=filters,
+        order="feature_date",
+    )
+
+    if not rows:
+        return [], np.empty((0, 0), dtype=np.float32)
+
+    dims = {row["feature_dim"] for row in rows}
+    if len(dims) != 1:
+        raise ValueError(f"Mixed feature dimensions in result: {sorted(dims)}")
+
+    payload = b"".join(base64.b64decode(row.pop("feature_vector_f32")) for row in rows)
+    matrix = np.frombuffer(payload, dtype=FEATURE_VECTOR_DTYPE).reshape(len(rows), dims.pop())
+
+    return rows, matrix
 
 
 def insert_prediction(prediction_data: dict) -> dict:
-    client = get_supabase_client()
-    result = client.table("hunger_predictions").upsert(
-        prediction_data,
-        on_conflict="subcounty_code,target_month,model_version"
-    ).execute()
-    return result.data[0] if result.data else {}
+    result = get_storage().upsert(
+        "hunger_predictions", [prediction_data], PREDICTION_CONFLICT
+    )
+    return result[0] if result else {}
+
+
+def insert_predictions(predictions: list[dict]) -> list[dict]:
+    return get_storage().upsert("hunger_predictions", predictions, PREDICTION_CONFLICT)
 
 
 def get_predictions(
@@ -74,37 +211,39 @@ def get_predictions(
     target_month: str | None = None,
     risk_level: str | None = None,
 ) -> list[dict]:
-    client = get_supabase_client()
-    query = client.table("hunger_predictions").select("*")
+    filters = []
     if subcounty_code:
-        query = query.eq("subcounty_code", subcounty_code)
+        filters.append(("subcounty_code", "eq", subcounty_code))
     if target_month:
-        query = query.eq("target_month", target_month)
+        filters.append(("target_month", "eq", target_month))
     if risk_level:
-        query = query.eq("risk_level", risk_level)
-    result = query.order("target_month", desc=True).execute()
-    return result.data
-
-
-def get_latest_predictions() -> list[dict]:
-    client = get_supabase_client()
-    result = (
-        client.table("hunger_predictions")
-        .select("*, asal_admin3_boundaries(*)")
-        .order("target_month", desc=True)
-        .limit(500)
-        .execute()
+        filters.append(("risk_level", "eq", risk_level))
+    return get_storage().select(
+        "hunger_predictions", filters=filters, order="target_month", desc=True
     )
-    return result.data
+
+
+def get_latest_predictions(limit: int = 500) -> list[dict]:
+    storage = get_storage()
+    predictions = storage.select(
+        "hunger_predictions", order="target_month", desc=True, limit=limit
+    )
+    codes = sorted({p["subcounty_code"] for p in predictions})
+    boundaries = {
+        b["subcounty_code"]: b
+        for b in storage.select(
+            "asal_admin3_boundaries", filters=[("subcounty_code", "in", codes)]
+        )
+    } if codes else {}
+
+    for prediction in predictions:
+        prediction["asal_admin3_boundaries"] = boundaries.get(prediction["subcounty_code"])
+    return predictions
 
 
 def insert_ipc_historical(ipc_data: dict) -> dict:
-    client = get_supabase_client()
-    result = client.table("ipc_historical_data").upsert(
-        ipc_data,
-        on_conflict="subcounty_code,analysis_period_start,analysis_period_end"
-    ).execute()
-    return result.data[0] if result.data else {}
+    result = get_storage().upsert("ipc_historical_data", [ipc_data], IPC_CONFLICT)
+    return result[0] if result else {}
 
 
 def get_ipc_historical(
@@ -112,13 +251,16 @@ def get_ipc_historical(
     start_date: str | None = None,
     end_date: str | None = None,
 ) -> list[dict]:
-    client = get_supabase_client()
-    query = client.table("ipc_historical_data").select("*")
+    filters = []
     if subcounty_code:
-        query = query.eq("subcounty_code", subcounty_code)
+        filters.append(("subcounty_code", "eq", subcounty_code))
     if start_date:
-        query = query.gte("analysis_period_start", start_date)
+        filters.append(("analysis_period_start", "gte", start_date))
     if end_date:
-        query = query.lte("analysis_period_end", end_date)
-    result = query.order("analysis_period_start", desc=True).execute()
-    return result.data
+        filters.append(("analysis_period_end", "lte", end_date))
+    return get_storage().select(
+        "ipc_historical_data",
+        filters=filters,
+        order="analysis_period_start",
+        desc=True,
+    )
@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from config import PROCESSED_DIR
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = PROCESSED_DIR / "profiles"
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted(labels.items())))
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": round(self.total, 6),
+            "mean": round(self.total / self.count, 6) if self.count else None,
+            "min": round(self.min, 6) if self.count else None,
+            "max": round(self.max, 6),
+            "buckets": dict(zip([str(b) for b in self.buckets], self.bucket_counts)),
+        }
+
+
+class RunProfile:
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.wall_seconds: Optional[float] = None
+        self.counters: dict[tuple, float] = {}
+        self.histograms: dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self._start
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": round(self.wall_seconds, 6) if self.wall_seconds else None,
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ],
+            "timers": [
+                {"name": name, "labels": dict(labels), **histogram.to_dict()}
+                for (name, labels), histogram in sorted(self.histograms.items())
+            ],
+        }
+
+    def to_prometheus(self, prefix: str = "ml_pipeline") -> str:
+        def fmt(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+        lines = []
+        seen_types = set()
+
+        for (name, labels), value in sorted(self.counters.items()):
+            metric = f"{prefix}_{name}_total"
+            if metric not in seen_types:
+                lines.append(f"# TYPE {metric} counter")
+                seen_types.add(metric)
+            lines.append(f"{metric}{fmt(labels)} {value}")
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            metric = f"{prefix}_{name}_seconds"
+            if metric not in seen_types:
+                lines.append(f"# TYPE {metric} histogram")
+                seen_types.add(metric)
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, histogram.bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{metric}_bucket{fmt(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{metric}_bucket{fmt(labels, [('le', '+Inf')])} {histogram.count}")
+            lines.append(f"{metric}_sum{fmt(labels)} {histogram.total}")
+            lines.append(f"{metric}_count{fmt(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+_enabled = os.getenv("ML_PIPELINE_PROFILE", "").lower() in ("1", "true", "yes")
+_prometheus = os.getenv("ML_PIPELINE_PROFILE_PROMETHEUS", "").lower() in ("1", "true", "yes")
+_active: Optional[RunProfile] = None
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _Timer:
+    __slots__ = ("profile", "name", "labels", "start")
+
+    def __init__(self, profile: RunProfile, name: str, labels: dict):
+        self.profile = profile
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def enable(prometheus: bool = False):
+    global _enabled, _prometheus
+    _enabled = True
+    _prometheus = prometheus
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def active_profile() -> Optional[RunProfile]:
+    return _active
+
+
+def timer(name: str, **labels):
+    profile = _active
+    if profile is None:
+        return _NOOP_TIMER
+    return _Timer(profile, name, labels)
+
+
+def count(name: str, value: float = 1, **labels):
+    profile = _active
+    if profile is not None:
+        profile.count(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    profile = _active
+    if profile is not None:
+        profile.observe(name, value, **labels)
+
+
+def write_profile(profile: RunProfile, output_dir: Optional[Path] = None) -> Path:
+    if output_dir is None:
+        output_dir = PROFILE_DIR
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stem = f"{profile.name}_{profile.started_at.strftime('%Y%m%dT%H%M%S')}"
+
+    path = output_dir / f"{stem}.json"
+    with open(path, "w") as f:
+        json.dump(profile.to_dict(), f, indent=2, default=str)
+
+    if _prometheus:
+        (output_dir / f"{stem}.prom").write_text(profile.to_prometheus())
+
+    return path
+
+
+@contextmanager
+def run_profile(name: str, output_dir: Optional[Path] = None):
+    global _active
+
+    if not _enabled or _active is not None:
+        yield _active
+        return
+
+    profile = RunProfile(name)
+    _active = profile
+    try:
+        yield profile
+    finally:
+        _active = None
+        profile.finish()
+        path = write_profile(profile, output_dir)
+        logger.info(f"Wrote run profile to {path}")
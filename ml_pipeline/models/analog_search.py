@@ -0,0 +1,262 @@
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import CNN_CONFIG, MODEL_DIR
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _to_days(dates) -> np.ndarray:
+    return np.asarray(
+        [str(d)[:10] for d in np.atleast_1d(dates)], dtype="datetime64[D]"
+    )
+
+
+class IPCPhaseLookup:
+    def __init__(self, ipc_rows: list[dict]):
+        codes = np.array([r["subcounty_code"] for r in ipc_rows], dtype=str)
+        starts = _to_days([r["analysis_period_start"] for r in ipc_rows])
+        ends = _to_days([r["analysis_period_end"] for r in ipc_rows])
+        phases = np.array([r["ipc_phase"] for r in ipc_rows], dtype=np.int8)
+
+        self.codes, code_ids = np.unique(codes, return_inverse=True)
+        order = np.lexsort((starts, code_ids))
+
+        self._code_ids = code_ids[order]
+        self._starts = starts[order].astype(np.int64)
+        self._ends = ends[order].astype(np.int64)
+        self._phases = phases[order]
+        self._span = int(self._ends.max()) + 2 if len(order) else 1
+        self._keys = self._code_ids.astype(np.int64) * self._span + self._starts
+
+    def phases_at(self, subcounty_codes, dates) -> np.ndarray:
+        subcounty_codes = np.asarray(subcounty_codes, dtype=str)
+        days = _to_days(dates).astype(np.int64)
+        phases = np.zeros(len(subcounty_codes), dtype=np.int8)
+
+        if len(self._keys) == 0 or len(subcounty_codes) == 0:
+            return phases
+
+        code_pos = np.searchsorted(self.codes, subcounty_codes)
+        code_pos = np.clip(code_pos, 0, len(self.codes) - 1)
+        known = self.codes[code_pos] == subcounty_codes
+
+        query_keys = code_pos.astype(np.int64) * self._span + np.clip(days, 0, self._span - 1)
+        idx = np.searchsorted(self._keys, query_keys, side="right") - 1
+        valid = known & (idx >= 0)
+        idx = np.where(valid, idx, 0)
+
+        valid &= self._code_ids[idx] == code_pos
+        valid &= days <= self._ends[idx]
+
+        phases[valid] = self._phases[idx[valid]]
+        return phases
+
+
+class AnalogIndex:
+    def __init__(self, feature_dim: Optional[int] = None):
+        if feature_dim is None:
+            feature_dim = CNN_CONFIG["feature_dim"]
+
+        self.feature_dim = feature_dim
+        self._size = 0
+        self._vectors = np.empty((0, feature_dim), dtype=np.float32)
+        self._codes = np.empty(0, dtype=str)
+        self._dates = np.empty(0, dtype="datetime64[D]")
+        self._phases = np.empty(0, dtype=np.int8)
+        self._positions: dict[tuple[str, str], int] = {}
+        self.ipc_lookup: Optional[IPCPhaseLookup] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def subcounty_codes(self) -> np.ndarray:
+        return self._codes[: self._size]
+
+    @property
+    def feature_dates(self) -> np.ndarray:
+        return self._dates[: self._size]
+
+    @property
+    def ipc_phases(self) -> np.ndarray:
+        return self._phases[: self._size]
+
+    @property
+    def latest_date(self) -> Optional[date]:
+        if self._size == 0:
+            return None
+        return self.feature_dates.max().astype(object)
+
+    def _reserve(self, capacity: int):
+        if capacity <= len(self._vectors):
+            return
+
+        capacity = max(capacity, 2 * len(self._vectors), 1024)
+
+        vectors = np.empty((capacity, self.feature_dim), dtype=np.float32)
+        vectors[: self._size] = self._vectors[: self._size]
+        self._vectors = vectors
+
+        codes = np.empty(capacity, dtype=self._codes.dtype)
+        codes[: self._size] = self._codes[: self._size]
+        self._codes = codes
+
+        dates = np.empty(capacity, dtype="datetime64[D]")
+        dates[: self._size] = self._dates[: self._size]
+        self._dates = dates
+
+        phases = np.zeros(capacity, dtype=np.int8)
+        phases[: self._size] = self._phases[: self._size]
+        self._phases = phases
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def add(self, subcounty_codes, feature_dates, vectors: np.ndarray) -> int:
+        vectors = self._normalize(np.atleast_2d(vectors))
+        if vectors.shape[1] != self.feature_dim:
+            raise ValueError(
+                f"Expected {self.feature_dim}-d feature vectors, got {vectors.shape[1]}"
+            )
+
+        codes = np.asarray(subcounty_codes, dtype=str)
+        if codes.dtype.itemsize > self._codes.dtype.itemsize:
+            self._codes = self._codes.astype(codes.dtype)
+        dates = _to_days(feature_dates)
+        phases = (
+            self.ipc_lookup.phases_at(codes, dates)
+            if self.ipc_lookup is not None
+            else np.zeros(len(codes), dtype=np.int8)
+        )
+
+        self._reserve(self._size + len(codes))
+
+        added = 0
+        for code, day, vector, phase in zip(codes, dates, vectors, phases):
+            key = (str(code), str(day))
+            pos = self._positions.get(key)
+            if pos is None:
+                pos = self._size
+                self._positions[key] = pos
+                self._size += 1
+                added += 1
+
+            self._vectors[pos] = vector
+            self._codes[pos] = code
+            self._dates[pos] = day
+            self._phases[pos] = phase
+
+        return added
+
+    def set_ipc_history(self, ipc_rows: list[dict]):
+        self.ipc_lookup = IPCPhaseLookup(ipc_rows)
+        self._phases[: self._size] = self.ipc_lookup.phases_at(
+            self.subcounty_codes, self.feature_dates
+        )
+
+    def query(
+        self,
+        vector: np.ndarray,
+        k: int = 10,
+        exclude_subcounty: Optional[str] = None,
+        before: Optional[date] = None,
+    ) -> list[dict]:
+        if self._size == 0:
+            return []
+
+        query = self._normalize(np.asarray(vector).reshape(-1))
+        similarity = self._vectors[: self._size] @ query
+
+        if exclude_subcounty is not None:
+            similarity[self.subcounty_codes == exclude_subcounty] = -np.inf
+        if before is not None:
+            similarity[self.feature_dates >= np.datetime64(before, "D")] = -np.inf
+
+        k = min(k, self._size)
+        top = np.argpartition(-similarity, k - 1)[:k]
+        top = top[np.argsort(-similarity[top])]
+        top = top[np.isfinite(similarity[top])]
+
+        return [
+            {
+                "subcounty_code": str(self._codes[i]),
+                "feature_date": str(self._dates[i]),
+                "similarity": float(similarity[i]),
+                "ipc_phase": int(self._phases[i]) or None,
+            }
+            for i in top
+        ]
+
+    def update_from_feature_store(
+        self,
+        feature_store,
+        model_version: str,
+        since: Optional[date] = None,
+    ) -> int:
+        if since is None and self.latest_date is not None:
+            since = self.latest_date
+
+        meta, matrix = feature_store.feature_matrix(
+            start_date=since, model_version=model_version
+        )
+        if len(meta) == 0:
+            return 0
+
+        added = self.add(
+            meta["subcounty_code"].to_numpy(), meta["feature_date"].to_numpy(), matrix
+        )
+        logger.info(f"Analog index: added {added} vectors ({self._size} total)")
+        return added
+
+    @classmethod
+    def from_feature_store(
+        cls,
+        feature_store,
+        model_version: str,
+        ipc_rows: Optional[list[dict]] = None,
+    ) -> "AnalogIndex":
+        index = cls(feature_store.feature_dim)
+        if ipc_rows is not None:
+            index.ipc_lookup = IPCPhaseLookup(ipc_rows)
+        index.update_from_feature_store(feature_store, model_version)
+        return index
+
+    def save(self, path: Optional[Path] = None) -> Path:
+        if path is None:
+            path = MODEL_DIR / "analog_index.npz"
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            vectors=self._vectors[: self._size],
+            subcounty_codes=self.subcounty_codes,
+            feature_dates=self.feature_dates,
+            ipc_phases=self.ipc_phases,
+        )
+        logger.info(f"Saved analog index with {self._size} vectors to {path}")
+        return path
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "AnalogIndex":
+        if path is None:
+            path = MODEL_DIR / "analog_index.npz"
+
+        with np.load(path) as archive:
+            vectors = archive["vectors"]
+            index = cls(vectors.shape[1])
+            index.add(archive["subcounty_codes"], archive["feature_dates"], vectors)
+            index._phases[: index._size] = archive["ipc_phases"]
+
+        logger.info(f"Loaded analog index with {len(index)} vectors from {path}")
+        return index
@@ -1,6 +1,6 @@
 import logging
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Iterable, Optional, Tuple
 
 import numpy as np
 import tensorflow as tf
@@ -11,6 +11,7 @@ from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint, ReduceLRO
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from config import CNN_CONFIG, MODEL_DIR, IPC_PHASE_MAPPING
+import instrumentation
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -47,6 +48,35 @@ class TemporalAttention(layers.Layer):
         return context, weights
 
 
+class LiteMaxPooling3D(layers.Layer):
+    def __init__(self, pool_size=(1, 2, 2), **kwargs):
+        super().__init__(**kwargs)
+        self.pool_size = tuple(pool_size)
+
+    def call(self, inputs):
+        pool_t, pool_h, pool_w = self.pool_size
+        steps, height, width, channels = inputs.shape[1:]
+        out_steps = steps // pool_t
+        out_height = height // pool_h
+        out_width = width // pool_w
+
+        x = tf.reshape(inputs, (-1, height, width, channels))
+        x = tf.nn.max_pool2d(x, (pool_h, pool_w), (pool_h, pool_w), "VALID")
+
+        if pool_t > 1:
+            flat = out_height * out_width * channels
+            x = tf.reshape(x, (-1, steps, flat))[:, : out_steps * pool_t]
+            x = tf.reshape(x, (-1, out_steps, pool_t, flat))
+            x = tf.reduce_max(x, axis=2)
+
+        return tf.reshape(x, (-1, out_steps, out_height, out_width, channels))
+
+    def get_config(self):
+        config = super().get_config()
+        config.update({"pool_size": self.pool_size})
+        return config
+
+
 def build_conv3d_block(
     x: tf.Tensor,
     filters: int,
@@ -125,7 +155,9 @@ def build_spatiotemporal_cnn(
     features = layers.Dense(feature_dim, activation="relu", name="feature_layer")(x)
     features = layers.Dropout(dropout_rate, name="feature_dropout")(features)
 
-    outputs = layers.Dense(num_classes, activation="softmax", name="classification")(features)
+    outputs = layers.Dense(
+        num_classes, activation="softmax", name="classification", dtype="float32"
+    )(features)
 
     model = Model(inputs=inputs, outputs=outputs, name="SpatiotemporalCNN")
 
@@ -172,7 +204,9 @@ def build_conv2d_lstm_model(
     features = layers.Dense(feature_dim, activation="relu", name="feature_layer")(x)
     features = layers.Dropout(dropout_rate, name="feature_dropout")(features)
 
-    outputs = layers.Dense(num_classes, activation="softmax", name="classification")(features)
+    outputs = layers.Dense(
+        num_classes, activation="softmax", name="classification", dtype="float32"
+    )(features)
 
     model = Model(inputs=inputs, outputs=outputs, name="Conv2DLSTM")
 
@@ -233,37 +267,68 @@ def build_convlstm_model(
     features = layers.Dense(feature_dim, activation="relu", name="feature_layer")(x)
     features = layers.Dropout(dropout_rate, name="feature_dropout")(features)
 
-    outputs = layers.Dense(num_classes, activation="softmax", name="classification")(features)
+    outputs = layers.Dense(
+        num_classes, activation="softmax", name="classification", dtype="float32"
+    )(features)
 
     model = Model(inputs=inputs, outputs=outputs, name="ConvLSTM")
 
     return model
 
 
+def cpu_supports_bfloat16() -> bool:
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
 class HungerPredictionModel:
     def __init__(
         self,
         model_type: str = "spatiotemporal",
         num_classes: int = 5,
         model_version: str = "v1.0",
+        performance_mode: bool = False,
     ):
         self.model_type = model_type
         self.num_classes = num_classes
         self.model_version = model_version
+        self.performance_mode = performance_mode
         self.model: Optional[Model] = None
         self.feature_extractor: Optional[Model] = None
+        self.quantized_model = None
         self.history = None
 
+    def _dtype_policy(self) -> str:
+        if self.performance_mode and cpu_supports_bfloat16():
+            return "mixed_bfloat16"
+        return "float32"
+
     def build(self) -> Model:
-        if self.model_type == "spatiotemporal":
-            self.model = build_spatiotemporal_cnn(num_classes=self.num_classes)
-        elif self.model_type == "conv2d_lstm":
-            self.model = build_conv2d_lstm_model(num_classes=self.num_classes)
-        elif self.model_type == "convlstm":
-            self.model = build_convlstm_model(num_classes=self.num_classes)
-        else:
+        builders = {
+            "spatiotemporal": build_spatiotemporal_cnn,
+            "conv2d_lstm": build_conv2d_lstm_model,
+            "convlstm": build_convlstm_model,
+        }
+        if self.model_type not in builders:
             raise ValueError(f"Unknown model type: {self.model_type}")
 
+        previous_policy = keras.mixed_precision.global_policy()
+        keras.mixed_precision.set_global_policy(self._dtype_policy())
+        try:
+            self.model = builders[self.model_type](num_classes=self.num_classes)
+        finally:
+            keras.mixed_precision.set_global_policy(previous_policy)
+
+        if self.performance_mode:
+            logger.info(
+                f"Built {self.model_type} with {self._dtype_policy()} policy"
+            )
+
         self._build_feature_extractor()
 
         return self.model
@@ -293,6 +358,7 @@ class HungerPredictionModel:
             optimizer=optimizer,
             loss="sparse_categorical_crossentropy",
             metrics=["accuracy"],
+            jit_compile=self.performance_mode,
         )
 
     def train(
@@ -310,45 +376,81 @@ class HungerPredictionModel:
         if batch_size is None:
             batch_size = CNN_CONFIG["batch_size"]
 
-        callbacks = [
+        self.history = self.model.fit(
+            X_train,
+            y_train,
+            validation_data=(X_val, y_val),
+            epochs=epochs,
+            batch_size=batch_size,
+            callbacks=self._build_callbacks(),
+            class_weight=class_weight,
+        )
+
+        return self.history
+
+    def train_on_dataset(
+        self,
+        train_dataset: tf.data.Dataset,
+        val_dataset: Optional[tf.data.Dataset] = None,
+        epochs: int = None,
+        class_weight: Optional[dict] = None,
+    ):
+        if epochs is None:
+            epochs = CNN_CONFIG["epochs"]
+
+        monitor = "val_loss" if val_dataset is not None else "loss"
+
+        self.history = self.model.fit(
+            train_dataset,
+            validation_data=val_dataset,
+            epochs=epochs,
+            callbacks=self._build_callbacks(monitor),
+            class_weight=class_weight,
+        )
+
+        return self.history
+
+    def _build_callbacks(self, monitor: str = "val_loss") -> list:
+        return [
             EarlyStopping(
-                monitor="val_loss",
+                monitor=monitor,
                 patience=CNN_CONFIG["early_stopping_patience"],
                 restore_best_weights=True,
             ),
             ReduceLROnPlateau(
-                monitor="val_loss",
+                monitor=monitor,
                 factor=0.5,
                 patience=5,
                 min_lr=1e-6,
             ),
             ModelCheckpoint(
                 filepath=str(MODEL_DIR / f"best_model_{self.model_version}.keras"),
-                monitor="val_loss",
+                monitor=monitor,
                 save_best_only=True,
             ),
         ]
 
-        self.history = self.model.fit(
-            X_train,
-            y_train,
-            validation_data=(X_val, y_val),
-            epochs=epochs,
-            batch_size=batch_size,
-            callbacks=callbacks,
-            class_weight=class_weight,
-        )
-
-        return self.history
-
     def extract_features(self, X: np.ndarray) -> np.ndarray:
+        if self.quantized_model is not None:
+            return self.quantized_model.extract_features(X)
+
         if self.feature_extractor is None:
             raise ValueError("Feature extractor not built")
 
-        return self.feature_extractor.predict(X)
+        with instrumentation.timer("model_forward", model=self.model_type, output="features"):
+            features = self.feature_extractor.predict(X, verbose=0)
+        instrumentation.count("model_samples", len(X), model=self.model_type)
+
+        return np.asarray(features, dtype=np.float32)
 
     def predict(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
-        probabilities = self.model.predict(X)
+        if self.quantized_model is not None:
+            return self.quantized_model.predict(X)
+
+        with instrumentation.timer("model_forward", model=self.model_type, output="probabilities"):
+            probabilities = self.model.predict(X, verbose=0)
+        instrumentation.count("model_samples", len(X), model=self.model_type)
+
         predictions = np.argmax(probabilities, axis=1) + 1
         return predictions, probabilities
 
@@ -377,6 +479,7 @@ class HungerPredictionModel:
         if path is None:
             path = MODEL_DIR / f"hunger_model_{self.model_version}.keras"
 
+        path.parent.mkdir(parents=True, exist_ok=True)
         self.model.save(path)
         logger.info(f"Model saved to {path}")
 
@@ -394,6 +497,140 @@ class HungerPredictionModel:
         self._build_feature_extractor()
         logger.info(f"Model loaded from {path}")
 
+    def export_inference(
+        self,
+        export_dir: Optional[Path] = None,
+        batch_size: int = 1,
+    ) -> Path:
+        from tensorflow.python.framework.convert_to_constants import (
+            convert_variables_to_constants_v2,
+        )
+
+        if self.model is None:
+            raise ValueError("Model must be built or loaded first")
+
+        if export_dir is None:
+            export_dir = MODEL_DIR / f"hunger_model_{self.model_version}_inference"
+
+        serve = self._build_serving_function(batch_size)
+        input_shape = tuple(serve.input_signature[0].shape)
+
+        frozen = convert_variables_to_constants_v2(serve.get_concrete_function())
+
+        export_dir.mkdir(parents=True, exist_ok=True)
+        tf.io.write_graph(
+            frozen.graph.as_graph_def(),
+            str(export_dir),
+            "frozen_graph.pb",
+            as_text=False,
+        )
+
+        signature = {
+            "model_type": self.model_type,
+            "model_version": self.model_version,
+            "num_classes": self.num_classes,
+            "batch_size": batch_size,
+            "input_shape": list(input_shape),
+            "inputs": [t.name for t in frozen.inputs],
+            "outputs": [t.name for t in frozen.outputs],
+        }
+
+        import json
+        with open(export_dir / "signature.json", "w") as f:
+            json.dump(signature, f, indent=2)
+
+        logger.info(f"Inference graph exported to {export_dir}")
+        return export_dir
+
+    def _build_lite_compatible_model(self) -> Model:
+        def clone_layer(layer):
+            if isinstance(layer, layers.MaxPooling3D):
+                return LiteMaxPooling3D(pool_size=layer.pool_size, name=layer.name)
+            return layer.__class__.from_config(layer.get_config())
+
+        lite_model = keras.models.clone_model(self.model, clone_function=clone_layer)
+        lite_model.set_weights(self.model.get_weights())
+        return lite_model
+
+    def _build_serving_function(self, batch_size: int = 1, lite_compatible: bool = False):
+        if self.model is None:
+            raise ValueError("Model must be built or loaded first")
+
+        source_model = self._build_lite_compatible_model() if lite_compatible else self.model
+
+        inference_model = Model(
+            inputs=source_model.input,
+            outputs=[
+                source_model.output,
+                source_model.get_layer("feature_layer").output,
+            ],
+            name="inference_model",
+        )
+        input_shape = (batch_size,) + tuple(self.model.input_shape[1:])
+
+        @tf.function(
+            input_signature=[tf.TensorSpec(input_shape, tf.float32, name="sequence")]
+        )
+        def serve(sequence):
+            probabilities, features = inference_model(sequence, training=False)
+            return [probabilities, tf.cast(features, tf.float32)]
+
+        return serve
+
+    def export_quantized(
+        self,
+        output_path: Optional[Path] = None,
+        mode: str = "dynamic",
+        representative_windows: Optional[Iterable[np.ndarray]] = None,
+    ) -> Path:
+        if mode not in ("dynamic", "int8"):
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        if mode == "int8" and representative_windows is None:
+            raise ValueError("int8 quantization requires representative windows")
+
+        if output_path is None:
+            output_path = MODEL_DIR / f"hunger_model_{self.model_version}_{mode}.tflite"
+
+        serve = self._build_serving_function(batch_size=1, lite_compatible=True)
+        converter = tf.lite.TFLiteConverter.from_concrete_functions(
+            [serve.get_concrete_function()], self.model
+        )
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        if mode == "int8":
+            def representative_dataset():
+                for window in representative_windows:
+                    yield [np.asarray(window, dtype=np.float32)[np.newaxis]]
+
+            converter.representative_dataset = representative_dataset
+            converter.target_spec.supported_ops = [
+                tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+                tf.lite.OpsSet.TFLITE_BUILTINS,
+            ]
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_bytes(converter.convert())
+
+        signature = {
+            "model_type": self.model_type,
+            "model_version": self.model_version,
+            "num_classes": self.num_classes,
+            "quantization": mode,
+        }
+
+        import json
+        with open(output_path.with_suffix(".json"), "w") as f:
+            json.dump(signature, f, indent=2)
+
+        logger.info(f"Quantized ({mode}) model exported to {output_path}")
+        return output_path
+
+    def load_quantized(self, path: Path):
+        from models.inference import QuantizedInferenceModel
+
+        self.quantized_model = QuantizedInferenceModel(path)
+        logger.info(f"Using quantized runtime from {path}")
+
     def summary(self):
         if self.model:
             self.model.summary()
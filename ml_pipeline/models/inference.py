@@ -0,0 +1,237 @@
+import json
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import MODEL_DIR, IPC_PHASE_MAPPING
+import instrumentation
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def default_export_dir(model_version: str) -> Path:
+    return MODEL_DIR / f"hunger_model_{model_version}_inference"
+
+
+def is_quantized_export(path: Optional[Path]) -> bool:
+    return (
+        path is not None
+        and path.suffix == ".tflite"
+        and path.exists()
+        and path.with_suffix(".json").exists()
+    )
+
+
+def is_inference_export(path: Optional[Path]) -> bool:
+    return (
+        path is not None
+        and (path / "frozen_graph.pb").exists()
+        and (path / "signature.json").exists()
+    )
+
+
+class _BaseInferenceModel(ABC):
+    num_classes: int
+    model_type: str
+
+    @abstractmethod
+    def _run(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        ...
+
+    def _forward(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        with instrumentation.timer("model_forward", model=self.model_type, output="both"):
+            outputs = self._run(X)
+        instrumentation.count("model_samples", len(X), model=self.model_type)
+        return outputs
+
+    def extract_features(self, X: np.ndarray) -> np.ndarray:
+        return self._forward(X)[1]
+
+    def predict(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        probabilities, _ = self._forward(X)
+        predictions = np.argmax(probabilities, axis=1) + 1
+        return predictions, probabilities
+
+    def predict_single(self, sequence: np.ndarray) -> dict:
+        if len(sequence.shape) == 4:
+            sequence = np.expand_dims(sequence, axis=0)
+
+        probabilities, features = self._forward(sequence)
+
+        ipc_phase = int(np.argmax(probabilities[0]) + 1)
+        prob_dict = {
+            f"phase_{i+1}": float(probabilities[0, i])
+            for i in range(self.num_classes)
+        }
+
+        return {
+            "ipc_phase_predicted": ipc_phase,
+            "ipc_phase_probability": prob_dict,
+            "confidence_score": float(np.max(probabilities[0])),
+            "risk_level": IPC_PHASE_MAPPING[ipc_phase],
+            "feature_vector": features[0].tolist(),
+        }
+
+
+class InferenceModel(_BaseInferenceModel):
+    def __init__(self, export_dir: Path):
+        with open(export_dir / "signature.json") as f:
+            self.signature = json.load(f)
+
+        self.model_type = self.signature["model_type"]
+        self.model_version = self.signature["model_version"]
+        self.num_classes = self.signature["num_classes"]
+        self.batch_size = self.signature["batch_size"]
+        self.input_shape = tuple(self.signature["input_shape"])
+
+        import tensorflow as tf
+
+        graph_def = tf.compat.v1.GraphDef()
+        graph_def.ParseFromString((export_dir / "frozen_graph.pb").read_bytes())
+
+        def _import_graph():
+            tf.compat.v1.import_graph_def(graph_def, name="")
+
+        wrapped = tf.compat.v1.wrap_function(_import_graph, [])
+        self._serve = wrapped.prune(
+            feeds=[wrapped.graph.get_tensor_by_name(n) for n in self.signature["inputs"]],
+            fetches=[wrapped.graph.get_tensor_by_name(n) for n in self.signature["outputs"]],
+        )
+
+        logger.info(f"Inference graph loaded from {export_dir}")
+
+    def _run(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        import tensorflow as tf
+
+        X = np.asarray(X, dtype=np.float32)
+        n_samples = X.shape[0]
+
+        probabilities = []
+        features = []
+
+        for start in range(0, n_samples, self.batch_size):
+            chunk = X[start : start + self.batch_size]
+            n_chunk = chunk.shape[0]
+
+            if n_chunk < self.batch_size:
+                padded = np.zeros(self.input_shape, dtype=np.float32)
+                padded[:n_chunk] = chunk
+                chunk = padded
+
+            chunk_probs, chunk_features = self._serve(tf.constant(chunk))
+            probabilities.append(chunk_probs.numpy()[:n_chunk])
+            features.append(chunk_features.numpy()[:n_chunk])
+
+        return np.concatenate(probabilities), np.concatenate(features)
+
+
+class QuantizedInferenceModel(_BaseInferenceModel):
+    def __init__(self, model_path: Path, num_threads: Optional[int] = None):
+        with open(model_path.with_suffix(".json")) as f:
+            self.signature = json.load(f)
+
+        self.model_type = self.signature["model_type"]
+        self.model_version = self.signature["model_version"]
+        self.num_classes = self.signature["num_classes"]
+        self.quantization = self.signature["quantization"]
+
+        import tensorflow as tf
+
+        self.interpreter = tf.lite.Interpreter(
+            model_path=str(model_path), num_threads=num_threads
+        )
+        self.interpreter.allocate_tensors()
+        self._input_index = self.interpreter.get_input_details()[0]["index"]
+
+        outputs = self.interpreter.get_output_details()
+        self._probability_index = next(
+            o["index"] for o in outputs if o["shape"][-1] == self.num_classes
+        )
+        self._feature_index = next(
+            o["index"] for o in outputs if o["index"] != self._probability_index
+        )
+
+        logger.info(f"Quantized ({self.quantization}) model loaded from {model_path}")
+
+    def _run(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        X = np.asarray(X, dtype=np.float32)
+
+        probabilities = []
+        features = []
+
+        for sample in X:
+            self.interpreter.set_tensor(self._input_index, sample[np.newaxis])
+            self.interpreter.invoke()
+            probabilities.append(self.interpreter.get_tensor(self._probability_index)[0])
+            features.append(self.interpreter.get_tensor(self._feature_index)[0])
+
+        return np.stack(probabilities), np.stack(features)
+
+
+def quantization_report(
+    float_model,
+    quantized_model: QuantizedInferenceModel,
+    X: np.ndarray,
+    y: Optional[np.ndarray] = None,
+) -> dict:
+    import time
+
+    start = time.perf_counter()
+    float_phases, float_probs = float_model.predict(X)
+    float_seconds = time.perf_counter() - start
+    float_features = float_model.extract_features(X)
+
+    start = time.perf_counter()
+    quant_probs, quant_features = quantized_model._run(X)
+    quant_seconds = time.perf_counter() - start
+    quant_phases = np.argmax(quant_probs, axis=1) + 1
+
+    prob_delta = np.abs(quant_probs - float_probs)
+    cosine = np.sum(float_features * quant_features, axis=1) / np.maximum(
+        np.linalg.norm(float_features, axis=1) * np.linalg.norm(quant_features, axis=1),
+        1e-12,
+    )
+
+    report = {
+        "quantization": quantized_model.quantization,
+        "n_samples": int(len(X)),
+        "phase_agreement": float(np.mean(float_phases == quant_phases)),
+        "max_abs_probability_delta": float(prob_delta.max()),
+        "mean_abs_probability_delta": float(prob_delta.mean()),
+        "mean_feature_cosine_similarity": float(np.mean(cosine)),
+        "float_ms_per_sample": float_seconds / len(X) * 1000,
+        "quantized_ms_per_sample": quant_seconds / len(X) * 1000,
+    }
+
+    if y is not None:
+        y = np.asarray(y) + 1
+        report["float_accuracy"] = float(np.mean(float_phases == y))
+        report["quantized_accuracy"] = float(np.mean(quant_phases == y))
+        report["accuracy_delta"] = report["quantized_accuracy"] - report["float_accuracy"]
+
+    return report
+
+
+if __name__ == "__main__":
+    import time
+
+    from models.cnn_architecture import HungerPredictionModel
+
+    model = HungerPredictionModel(model_type="spatiotemporal")
+    model.build()
+    export_dir = model.export_inference()
+
+    start = time.perf_counter()
+    inference_model = InferenceModel(export_dir)
+    result = inference_model.predict_single(np.random.rand(12, 64, 64, 1))
+    elapsed = time.perf_counter() - start
+
+    print(f"Load + first prediction: {elapsed:.2f}s")
+    print(f"Predicted IPC Phase: {result['ipc_phase_predicted']}")
+    print(f"Feature vector shape: {len(result['feature_vector'])}")
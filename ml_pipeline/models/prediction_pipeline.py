@@ -1,41 +1,188 @@
 import logging
-from datetime import date, timedelta
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import (
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 import numpy as np
 
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
+import instrumentation
 from config import (
     CNN_CONFIG,
     MODEL_DIR,
+    PIPELINE_CONFIG,
     TEMPORAL_CONFIG,
     IPC_PHASE_MAPPING,
 )
 from db.supabase_client import (
-    get_supabase_client,
     get_admin3_boundaries,
     insert_prediction,
+    insert_predictions,
     insert_cnn_features,
+    insert_cnn_features_batch,
 )
-from preprocessing.raster_processor import RasterProcessor
+from preprocessing.raster_processor import FrameCache, RasterProcessor, rasterize_zone_masks
 from preprocessing.feature_calculator import FeatureCalculator
-from models.cnn_architecture import HungerPredictionModel
+from models.inference import (
+    InferenceModel,
+    QuantizedInferenceModel,
+    default_export_dir,
+    is_inference_export,
+    is_quantized_export,
+)
+from models.prediction_results import PredictionResultSet
+from models.run_ledger import RunLedger, compute_input_checksum
+
+if TYPE_CHECKING:
+    from db.feature_store import LocalFeatureStore
+    from models.cnn_architecture import HungerPredictionModel
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+_worker_processor: Optional[RasterProcessor] = None
+
+
+def _init_preprocess_worker():
+    global _worker_processor
+    _worker_processor = RasterProcessor(tile_workers=1)
+
+
+def _build_sequence_in_worker(
+    raster_paths: list[Path], sequence_length: int
+) -> Optional[np.ndarray]:
+    return _worker_processor.create_temporal_sequence(raster_paths, sequence_length)
+
+
+class RunContext:
+    def __init__(
+        self,
+        target_month: date,
+        sequence_length: int,
+        rasters: list[dict],
+        raster_paths: list[Path],
+        resolved_at: datetime,
+        data_type: str = "monthly",
+    ):
+        self.target_month = target_month
+        self.sequence_length = sequence_length
+        self.rasters = rasters
+        self.raster_paths = raster_paths
+        self.resolved_at = resolved_at
+        self.data_type = data_type
+        self.sequence: Optional[np.ndarray] = None
+        self.input_checksum = (
+            compute_input_checksum(rasters) if self.is_complete else None
+        )
+
+    @classmethod
+    def resolve(
+        cls,
+        raster_processor: RasterProcessor,
+        target_month: date,
+        sequence_length: int = 12,
+        data_type: str = "monthly",
+    ) -> "RunContext":
+        period_days = 31 if data_type == "monthly" else 11
+        start_date = target_month - timedelta(days=sequence_length * period_days)
+
+        rasters = raster_processor.get_available_rasters(
+            data_type=data_type,
+            start_date=start_date,
+            end_date=target_month,
+        )[-sequence_length:]
+
+        raster_paths = [Path(r["file_path"]) for r in rasters if r["file_path"]]
+        raster_paths = [p for p in raster_paths if p.exists()]
+
+        return cls(
+            target_month, sequence_length, rasters, raster_paths, datetime.now(), data_type
+        )
+
+    @property
+    def is_complete(self) -> bool:
+        return (
+            len(self.rasters) >= self.sequence_length
+            and len(self.raster_paths) >= self.sequence_length
+        )
+
+    def describe(self) -> dict:
+        return {
+            "target_month": self.target_month.isoformat(),
+            "data_type": self.data_type,
+            "sequence_length": self.sequence_length,
+            "resolved_at": self.resolved_at.isoformat(),
+            "source_files": [str(p) for p in self.raster_paths],
+            "input_checksum": self.input_checksum,
+        }
+
+
 class HungerPredictionPipeline:
-    def __init__(self, model_version: str = "v1.0"):
+    def __init__(
+        self,
+        model_version: str = "v1.0",
+        ledger: Optional[RunLedger] = None,
+        feature_store: Optional["LocalFeatureStore"] = None,
+    ):
         self.model_version = model_version
-        self.supabase = get_supabase_client()
+        self.ledger = ledger if ledger is not None else RunLedger()
+        if feature_store is None:
+            from db.feature_store import LocalFeatureStore
+            feature_store = LocalFeatureStore()
+        self.feature_store = feature_store
         self.raster_processor = RasterProcessor()
+        self.frame_cache = FrameCache(self.raster_processor, data_type="dekadal")
         self.feature_calculator = FeatureCalculator()
-        self.model: Optional[HungerPredictionModel] = None
+        self.model: Optional[
+            "HungerPredictionModel | InferenceModel | QuantizedInferenceModel"
+        ] = None
+        self.last_run_context: Optional[RunContext] = None
+        self._zone_masks: dict[str, np.ndarray] = {}
+        self.last_result_set: Optional[PredictionResultSet] = None
+
+    @property
+    def model_data_type(self) -> str:
+        if self.model_version.endswith(TEMPORAL_CONFIG["dekadal_model_suffix"]):
+            return "dekadal"
+        return "monthly"
+
+    def _require_model_data_type(self, data_type: str):
+        if self.model_data_type != data_type:
+            raise ValueError(
+                f"Model version {self.model_version!r} was trained on {self.model_data_type} "
+                f"frames and cannot serve {data_type} predictions; dekad-trained versions "
+                f"end in {TEMPORAL_CONFIG['dekadal_model_suffix']!r}"
+            )
 
     def load_model(self, model_path: Optional[Path] = None):
+        if model_path is None and is_inference_export(default_export_dir(self.model_version)):
+            model_path = default_export_dir(self.model_version)
+
+        if is_quantized_export(model_path):
+            self.model = QuantizedInferenceModel(model_path)
+            logger.info(f"Loaded quantized model from {model_path}")
+            return
+
+        if is_inference_export(model_path):
+            self.model = InferenceModel(model_path)
+            logger.info(f"Loaded inference graph from {model_path}")
+            return
+
+        from models.cnn_architecture import HungerPredictionModel
+
         self.model = HungerPredictionModel(
             model_type="spatiotemporal",
             model_version=self.model_version,
@@ -49,41 +196,50 @@ class HungerPredictionPipeline:
             self.model.compile()
             logger.info("Built new model (not trained)")
 
+    def resolve_run_context(
+        self,
+        target_month: date,
+        sequence_length: int = 12,
+        data_type: str = "monthly",
+    ) -> RunContext:
+        context = RunContext.resolve(
+            self.raster_processor, target_month, sequence_length, data_type
+        )
+        self.last_run_context = context
+
+        logger.info(
+            f"Resolved {len(context.raster_paths)} rasters for {target_month} "
+            f"at {context.resolved_at.isoformat()}"
+        )
+
+        return context
+
     def prepare_sequence_for_boundary(
         self,
         boundary: dict,
         target_date: date,
         sequence_length: int = 12,
+        context: Optional[RunContext] = None,
     ) -> Optional[np.ndarray]:
-        end_date = target_date
-        start_date = target_date - timedelta(days=sequence_length * 30)
+        if context is None:
+            context = self.resolve_run_context(target_date, sequence_length)
 
-        rasters = self.raster_processor.get_available_rasters(
-            data_type="monthly",
-            start_date=start_date,
-            end_date=end_date,
-        )
-
-        if len(rasters) < sequence_length:
+        if len(context.rasters) < sequence_length:
             logger.warning(
                 f"Insufficient rasters for {boundary['subcounty_code']}: "
-                f"need {sequence_length}, have {len(rasters)}"
+                f"need {sequence_length}, have {len(context.rasters)}"
             )
             return None
 
-        raster_paths = [
-            Path(r["file_path"]) for r in rasters[-sequence_length:]
-            if r["file_path"]
-        ]
-
-        raster_paths = [p for p in raster_paths if p.exists()]
-
-        if len(raster_paths) < sequence_length:
+        if len(context.raster_paths) < sequence_length:
             logger.warning(f"Missing raster files for {boundary['subcounty_code']}")
             return None
 
+        if context.sequence is not None:
+            return context.sequence
+
         sequence = self.raster_processor.create_temporal_sequence(
-            raster_paths, sequence_length
+            context.raster_paths, sequence_length
         )
 
         return sequence
@@ -93,13 +249,15 @@ class HungerPredictionPipeline:
         boundary: dict,
         sequence: np.ndarray,
         target_date: date,
+        cnn_features: Optional[np.ndarray] = None,
     ) -> dict:
         if self.model is None:
             raise ValueError("Model not loaded")
 
-        cnn_features = self.model.extract_features(
-            np.expand_dims(sequence, axis=0)
-        )[0].tolist()
+        if cnn_features is None:
+            cnn_features = self.model.extract_features(
+                np.expand_dims(self._zone_sequence(boundary, sequence), axis=0)
+            )[0]
 
         precip_time_series = sequence.mean(axis=(1, 2, 3))
 
@@ -124,6 +282,16 @@ class HungerPredictionPipeline:
 
         return features
 
+    def _zone_sequence(self, boundary: dict, sequence: np.ndarray) -> np.ndarray:
+        code = boundary["subcounty_code"]
+        if code not in self._zone_masks:
+            self._zone_masks[code] = rasterize_zone_masks([boundary], sequence.shape[1:3])[0]
+
+        mask = self._zone_masks[code]
+        if not mask.any():
+            return sequence
+        return sequence * mask[..., np.newaxis]
+
     def _get_historical_monthly_precip(
         self, subcounty_code: str
     ) -> dict[int, np.ndarray]:
@@ -137,14 +305,16 @@ class HungerPredictionPipeline:
         boundary: dict,
         features: dict,
         target_month: date,
+        result: Optional[dict] = None,
+        sequence: Optional[np.ndarray] = None,
     ) -> dict:
         if self.model is None:
             raise ValueError("Model not loaded")
 
-        feature_vector = np.array(features["feature_vector"])
-        sequence = np.random.rand(1, 12, 64, 64, 1)
-
-        result = self.model.predict_single(sequence)
+        if result is None:
+            if sequence is None:
+                raise ValueError("make_prediction needs either a result or a sequence")
+            result = self.model.predict_single(self._zone_sequence(boundary, sequence))
 
         drivers = self.feature_calculator.get_primary_drought_drivers(features)
 
@@ -182,94 +352,620 @@ class HungerPredictionPipeline:
 
         return importance
 
+    def _predict_boundary(
+        self,
+        boundary: dict,
+        target_month: date,
+        context: RunContext,
+    ) -> tuple[dict, dict]:
+        if self.model is None:
+            self.load_model()
+
+        with instrumentation.timer("sequence_build"):
+            sequence = self.prepare_sequence_for_boundary(
+                boundary, target_month, context.sequence_length, context
+            )
+
+        if sequence is None:
+            raise ValueError(f"No input sequence for {target_month}")
+
+        features = self.extract_features_for_boundary(
+            boundary, sequence, target_month
+        )
+        prediction = self.make_prediction(
+            boundary, features, target_month, sequence=sequence
+        )
+
+        logger.debug(
+            f"Predicted IPC {prediction['ipc_phase_predicted']} "
+            f"for {boundary['subcounty_name']}"
+        )
+
+        return features, prediction
+
+    def _predict_batch(
+        self,
+        items: list[tuple[int, dict, np.ndarray]],
+        target_month: date,
+    ) -> list[tuple[int, dict, tuple[dict, dict]]]:
+        sequences = np.stack(
+            [self._zone_sequence(boundary, sequence) for _, boundary, sequence in items]
+        )
+
+        cnn_features = self.model.extract_features(sequences)
+        _, probabilities = self.model.predict(sequences)
+
+        outcomes = []
+        for i, (index, boundary, sequence) in enumerate(items):
+            ipc_phase = int(np.argmax(probabilities[i]) + 1)
+            result = {
+                "ipc_phase_predicted": ipc_phase,
+                "ipc_phase_probability": {
+                    f"phase_{k+1}": float(p) for k, p in enumerate(probabilities[i])
+                },
+                "confidence_score": float(np.max(probabilities[i])),
+                "risk_level": IPC_PHASE_MAPPING[ipc_phase],
+            }
+
+            features = self.extract_features_for_boundary(
+                boundary, sequence, target_month, cnn_features=cnn_features[i]
+            )
+            prediction = self.make_prediction(
+                boundary, features, target_month, result=result
+            )
+            outcomes.append((index, boundary, (features, prediction)))
+
+        return outcomes
+
+    def _infer_stage_batch(
+        self,
+        batch: list[tuple[int, dict, object]],
+        target_month: date,
+        result_queue: queue.Queue,
+    ):
+        ready = []
+        for index, boundary, future in batch:
+            try:
+                sequence = future.result() if future is not None else None
+                if sequence is None:
+                    raise ValueError(f"No input sequence for {target_month}")
+                ready.append((index, boundary, sequence))
+            except Exception as e:
+                result_queue.put((index, boundary, e))
+
+        if not ready:
+            return
+
+        try:
+            outcomes = self._predict_batch(ready, target_month)
+        except Exception:
+            outcomes = []
+            for item in ready:
+                try:
+                    outcomes.extend(self._predict_batch([item], target_month))
+                except Exception as e:
+                    outcomes.append((item[0], item[1], e))
+
+        for outcome in outcomes:
+            result_queue.put(outcome)
+
+    def _write_boundary(self, features: dict, prediction: dict):
+        insert_cnn_features(features)
+        insert_prediction(prediction)
+
+    def _drain_writes(
+        self,
+        writes: dict,
+        results: dict[int, dict],
+        stored_features: list[dict],
+        target_month: date,
+        input_checksum: Optional[str],
+        return_when: str,
+    ):
+        done, _ = wait(list(writes), return_when=return_when)
+
+        for future in done:
+            index, boundary, features, prediction = writes.pop(future)
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(
+                    f"Error processing {boundary.get('subcounty_code', 'unknown')}: {e}"
+                )
+                continue
+
+            self.ledger.record(
+                boundary["subcounty_code"],
+                target_month,
+                self.model_version,
+                input_checksum,
+                prediction,
+            )
+            stored_features.append(features)
+            results[index] = prediction
+
+    def _run_pipelined(
+        self,
+        pending: list[tuple[int, dict]],
+        target_month: date,
+        context: RunContext,
+        save_to_db: bool,
+        input_checksum: Optional[str],
+        stored_features: list[dict],
+    ) -> dict[int, dict]:
+        if self.model is None:
+            self.load_model()
+
+        process_pool = None
+        if context.sequence is not None:
+            sequence_future = Future()
+            sequence_future.set_result(context.sequence)
+        else:
+            process_pool = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("forkserver"),
+                initializer=_init_preprocess_worker,
+            )
+            sequence_future = process_pool.submit(
+                _build_sequence_in_worker, context.raster_paths, context.sequence_length
+            )
+
+        try:
+            with ThreadPoolExecutor(max_workers=PIPELINE_CONFIG["io_workers"]) as io_pool:
+                results = self._run_pipeline_stages(
+                    pending,
+                    target_month,
+                    sequence_future,
+                    io_pool,
+                    save_to_db,
+                    input_checksum,
+                    stored_features,
+                )
+        finally:
+            if process_pool is not None:
+                process_pool.shutdown()
+
+        return results
+
+    def _run_pipeline_stages(
+        self,
+        pending: list[tuple[int, dict]],
+        target_month: date,
+        sequence_future: Optional[Future],
+        io_pool: ThreadPoolExecutor,
+        save_to_db: bool,
+        input_checksum: Optional[str],
+        stored_features: list[dict],
+    ) -> dict[int, dict]:
+        queue_size = PIPELINE_CONFIG["queue_size"]
+        batch_size = PIPELINE_CONFIG["inference_batch_size"]
+        prep_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        result_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        results: dict[int, dict] = {}
+
+        def preprocess_stage():
+            try:
+                for index, boundary in pending:
+                    prep_queue.put((index, boundary, sequence_future))
+            finally:
+                prep_queue.put(None)
+
+        def inference_stage():
+            batch = []
+            try:
+                while True:
+                    item = prep_queue.get()
+                    if item is None:
+                        break
+                    batch.append(item)
+                    if len(batch) >= batch_size:
+                        self._infer_stage_batch(batch, target_month, result_queue)
+                        batch = []
+                if batch:
+                    self._infer_stage_batch(batch, target_month, result_queue)
+            finally:
+                result_queue.put(None)
+
+        stages = [
+            threading.Thread(target=preprocess_stage, daemon=True),
+            threading.Thread(target=inference_stage, daemon=True),
+        ]
+        for stage in stages:
+            stage.start()
+
+        writes = {}
+        while True:
+            item = result_queue.get()
+            if item is None:
+                break
+
+            index, boundary, outcome = item
+            if isinstance(outcome, Exception):
+                logger.error(
+                    f"Error processing {boundary.get('subcounty_code', 'unknown')}: {outcome}"
+                )
+                continue
+
+            features, prediction = outcome
+            if not save_to_db:
+                results[index] = prediction
+                continue
+
+            writes[io_pool.submit(self._write_boundary, features, prediction)] = (
+                index,
+                boundary,
+                features,
+                prediction,
+            )
+            if len(writes) >= queue_size:
+                self._drain_writes(
+                    writes,
+                    results,
+                    stored_features,
+                    target_month,
+                    input_checksum,
+                    FIRST_COMPLETED,
+                )
+
+        if writes:
+            self._drain_writes(
+                writes,
+                results,
+                stored_features,
+                target_month,
+                input_checksum,
+                ALL_COMPLETED,
+            )
+
+        for stage in stages:
+            stage.join()
+
+        return results
+
     def run_monthly_predictions(
         self,
         target_month: date,
         save_to_db: bool = True,
+        force: bool = False,
+        pipelined: bool = False,
     ) -> list[dict]:
+        with instrumentation.run_profile(f"monthly_{target_month.isoformat()}"):
+            return self._run_monthly_predictions(
+                target_month, save_to_db, force, pipelined
+            )
+
+    def _run_monthly_predictions(
+        self,
+        target_month: date,
+        save_to_db: bool,
+        force: bool,
+        pipelined: bool,
+    ) -> list[dict]:
+        self._require_model_data_type("monthly")
         logger.info(f"Running predictions for {target_month}")
 
-        if self.model is None:
-            self.load_model()
+        context = self.resolve_run_context(target_month, CNN_CONFIG["time_steps"])
+        return self._run_predictions(target_month, context, save_to_db, force, pipelined)
+
+    def run_dekadal_predictions(
+        self,
+        target_dekad: Optional[date] = None,
+        save_to_db: bool = True,
+        force: bool = False,
+        pipelined: bool = False,
+    ) -> list[dict]:
+        target_dekad = dekad_end(target_dekad or latest_complete_dekad())
+        with instrumentation.run_profile(f"dekadal_{target_dekad.isoformat()}"):
+            return self._run_dekadal_predictions(
+                target_dekad, save_to_db, force, pipelined
+            )
+
+    def _run_dekadal_predictions(
+        self,
+        target_dekad: date,
+        save_to_db: bool,
+        force: bool,
+        pipelined: bool,
+    ) -> list[dict]:
+        self._require_model_data_type("dekadal")
+        sequence_length = TEMPORAL_CONFIG["sequence_length_dekads"]
+        if sequence_length != CNN_CONFIG["time_steps"]:
+            raise ValueError(
+                f"sequence_length_dekads ({sequence_length}) must match the model's "
+                f"time_steps ({CNN_CONFIG['time_steps']})"
+            )
+
+        logger.info(f"Running dekadal predictions for the dekad ending {target_dekad}")
 
+        context = self.resolve_run_context(target_dekad, sequence_length, data_type="dekadal")
+        if context.is_complete:
+            with instrumentation.timer("sequence_build"):
+                context.sequence = self.frame_cache.sequence(context.rasters, sequence_length)
+
+        return self._run_predictions(target_dekad, context, save_to_db, force, pipelined)
+
+    def _run_predictions(
+        self,
+        target_month: date,
+        context: RunContext,
+        save_to_db: bool,
+        force: bool,
+        pipelined: bool,
+    ) -> list[dict]:
         boundaries = get_admin3_boundaries()
+
+        if not context.is_complete:
+            logger.error(
+                f"Skipping predictions for {target_month}: need "
+                f"{context.sequence_length} rasters, have {len(context.raster_paths)}"
+            )
+            self.last_result_set = PredictionResultSet.from_predictions([], boundaries)
+            return []
+
         logger.info(f"Processing {len(boundaries)} sub-counties")
 
-        predictions = []
+        if not pipelined and context.sequence is None:
+            with instrumentation.timer("sequence_build"):
+                context.sequence = self.raster_processor.create_temporal_sequence(
+                    context.raster_paths, context.sequence_length
+                )
+
+        input_checksum = context.input_checksum if save_to_db else None
 
-        for boundary in boundaries:
-            try:
-                sequence = self.prepare_sequence_for_boundary(
-                    boundary, target_month
+        results: dict[int, dict] = {}
+        pending = []
+
+        for index, boundary in enumerate(boundaries):
+            if not force:
+                cached = self.ledger.lookup(
+                    boundary["subcounty_code"],
+                    target_month,
+                    self.model_version,
+                    input_checksum,
+                )
+                if cached is not None:
+                    results[index] = cached
+                    instrumentation.count("boundaries", status="cached")
+                    continue
+
+            pending.append((index, boundary))
+
+        skipped = len(results)
+        stored_features: list[dict] = []
+
+        if pipelined and pending:
+            results.update(
+                self._run_pipelined(
+                    pending,
+                    target_month,
+                    context,
+                    save_to_db,
+                    input_checksum,
+                    stored_features,
                 )
+            )
+        else:
+            for index, boundary in pending:
+                try:
+                    features, prediction = self._predict_boundary(
+                        boundary, target_month, context
+                    )
 
-                if sequence is None:
-                    logger.debug(f"Creating synthetic sequence for {boundary['subcounty_code']}")
-                    sequence = np.random.rand(
-                        CNN_CONFIG["time_steps"],
-                        CNN_CONFIG["input_height"],
-                        CNN_CONFIG["input_width"],
-                        CNN_CONFIG["channels"],
+                    if save_to_db:
+                        insert_cnn_features(features)
+                        insert_prediction(prediction)
+                        self.ledger.record(
+                            boundary["subcounty_code"],
+                            target_month,
+                            self.model_version,
+                            input_checksum,
+                            prediction,
+                        )
+                        stored_features.append(features)
+
+                    results[index] = prediction
+
+                except Exception as e:
+                    logger.error(
+                        f"Error processing {boundary.get('subcounty_code', 'unknown')}: {e}"
                     )
+                    continue
 
-                features = self.extract_features_for_boundary(
-                    boundary, sequence, target_month
-                )
+        with instrumentation.timer("feature_store_write"):
+            self.feature_store.write(stored_features)
+
+        predictions = [results[index] for index in sorted(results)]
+        computed = len(predictions) - skipped
+        instrumentation.count("boundaries", computed, status="computed")
+        instrumentation.count("boundaries", len(pending) - computed, status="failed")
+        self.last_result_set = PredictionResultSet.from_predictions(
+            predictions, boundaries
+        )
+
+        logger.info(
+            f"Completed {len(predictions)} predictions "
+            f"({skipped} unchanged since last run)"
+        )
 
-                if save_to_db:
-                    insert_cnn_features(features)
+        return predictions
+
+    def run_backfill(
+        self,
+        start_month: date,
+        end_month: date,
+        chunk_size: Optional[int] = None,
+        force: bool = False,
+    ) -> dict[str, int]:
+        profile_name = f"backfill_{start_month.isoformat()}_{end_month.isoformat()}"
+        with instrumentation.run_profile(profile_name):
+            return self._run_backfill(start_month, end_month, chunk_size, force)
+
+    def _run_backfill(
+        self,
+        start_month: date,
+        end_month: date,
+        chunk_size: Optional[int],
+        force: bool,
+    ) -> dict[str, int]:
+        self._require_model_data_type("monthly")
+        if chunk_size is None:
+            chunk_size = TEMPORAL_CONFIG["backfill_chunk_size"]
+
+        boundaries = sorted(get_admin3_boundaries(), key=lambda b: b["subcounty_code"])
+        chunks = [
+            boundaries[i : i + chunk_size]
+            for i in range(0, len(boundaries), chunk_size)
+        ]
+
+        completed = {}
+        result_sets = []
+
+        for target_month in iter_target_months(start_month, end_month):
+            context = self.resolve_run_context(target_month, CNN_CONFIG["time_steps"])
+            input_checksum = context.input_checksum
 
-                prediction = self.make_prediction(
-                    boundary, features, target_month
+            if not context.is_complete:
+                logger.warning(
+                    f"Skipping backfill for {target_month}: need "
+                    f"{context.sequence_length} rasters, have {len(context.raster_paths)}"
                 )
+                continue
+
+            if not force and self.ledger.is_month_committed(
+                target_month, self.model_version, input_checksum
+            ):
+                logger.info(f"Backfill for {target_month} already committed, skipping")
+                continue
 
-                if save_to_db:
-                    insert_prediction(prediction)
+            with instrumentation.timer("sequence_build"):
+                context.sequence = self.raster_processor.create_temporal_sequence(
+                    context.raster_paths, context.sequence_length
+                )
 
-                predictions.append(prediction)
+            logger.info(
+                f"Backfilling {target_month}: {len(boundaries)} sub-counties "
+                f"in {len(chunks)} chunks"
+            )
 
-                logger.debug(
-                    f"Predicted IPC {prediction['ipc_phase_predicted']} "
-                    f"for {boundary['subcounty_name']}"
+            n_predictions = 0
+            n_failed = 0
+
+            for chunk_index, chunk in enumerate(chunks):
+                if not force and self.ledger.is_chunk_committed(
+                    target_month, self.model_version, chunk_size, chunk_index, input_checksum
+                ):
+                    logger.debug(f"Chunk {chunk_index} for {target_month} already committed")
+                    continue
+
+                features_buffer = []
+                prediction_buffer = []
+                chunk_failed = 0
+
+                for boundary in chunk:
+                    if not force and self.ledger.lookup(
+                        boundary["subcounty_code"],
+                        target_month,
+                        self.model_version,
+                        input_checksum,
+                    ) is not None:
+                        continue
+
+                    try:
+                        features, prediction = self._predict_boundary(
+                            boundary, target_month, context
+                        )
+                    except Exception as e:
+                        logger.error(
+                            f"Error processing {boundary.get('subcounty_code', 'unknown')}: {e}"
+                        )
+                        chunk_failed += 1
+                        continue
+
+                    features_buffer.append(features)
+                    prediction_buffer.append(prediction)
+
+                insert_cnn_features_batch(features_buffer)
+                self.feature_store.write(features_buffer)
+                insert_predictions(prediction_buffer)
+                if chunk_failed:
+                    self.ledger.record_many(
+                        target_month, self.model_version, input_checksum, prediction_buffer
+                    )
+                    logger.warning(
+                        f"Chunk {chunk_index} for {target_month} left open: "
+                        f"{chunk_failed} sub-counties failed"
+                    )
+                else:
+                    self.ledger.commit_chunk(
+                        target_month,
+                        self.model_version,
+                        chunk_size,
+                        chunk_index,
+                        input_checksum,
+                        prediction_buffer,
+                    )
+                n_predictions += len(prediction_buffer)
+                n_failed += chunk_failed
+                result_sets.append(
+                    PredictionResultSet.from_predictions(prediction_buffer, chunk)
                 )
 
-            except Exception as e:
-                logger.error(
-                    f"Error processing {boundary.get('subcounty_code', 'unknown')}: {e}"
+            completed[target_month.isoformat()] = n_predictions
+            if n_failed:
+                logger.warning(
+                    f"Not committing {target_month}: {n_failed} sub-counties failed "
+                    "and will be retried on resume"
                 )
                 continue
 
-        logger.info(f"Completed {len(predictions)} predictions")
+            self.ledger.commit_month(
+                target_month, self.model_version, n_predictions, input_checksum
+            )
+            logger.info(f"Committed {n_predictions} predictions for {target_month}")
 
-        return predictions
+        self.last_result_set = PredictionResultSet.concat(result_sets)
 
-    def get_prediction_summary(self, predictions: list[dict]) -> dict:
-        if not predictions:
-            return {}
+        return completed
 
-        phases = [p["ipc_phase_predicted"] for p in predictions]
-        risk_counts = {}
-        for p in predictions:
-            risk = p["risk_level"]
-            risk_counts[risk] = risk_counts.get(risk, 0) + 1
+    def get_prediction_summary(
+        self, predictions: "list[dict] | PredictionResultSet"
+    ) -> dict:
+        if not isinstance(predictions, PredictionResultSet):
+            predictions = PredictionResultSet.from_predictions(predictions)
 
-        total_food_insecure = sum(p["food_insecure_population"] for p in predictions)
+        return predictions.summary()
 
-        return {
-            "total_subcounties": len(predictions),
-            "risk_distribution": risk_counts,
-            "average_ipc_phase": round(np.mean(phases), 2),
-            "max_ipc_phase": max(phases),
-            "total_food_insecure_population": total_food_insecure,
-            "high_risk_subcounties": [
-                p["subcounty_code"]
-                for p in predictions
-                if p["ipc_phase_predicted"] >= 3
-            ],
-        }
+
+def dekad_end(day: date) -> date:
+    if day.day <= 10:
+        return day.replace(day=10)
+    if day.day <= 20:
+        return day.replace(day=20)
+    next_month = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def latest_complete_dekad(today: Optional[date] = None) -> date:
+    today = today or date.today()
+    if dekad_end(today) == today:
+        return today
+    dekad_start = today.replace(day=1 if today.day <= 10 else 11 if today.day <= 20 else 21)
+    return dekad_start - timedelta(days=1)
 
 
-def run_batch_prediction(target_month: Optional[date] = None):
+def iter_target_months(start_month: date, end_month: date):
+    year, month = start_month.year, start_month.month
+
+    while (year, month) <= (end_month.year, end_month.month):
+        yield date(year, month, 1)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def run_batch_prediction(
+    target_month: Optional[date] = None,
+    force: bool = False,
+    pipelined: bool = False,
+):
     if target_month is None:
         today = date.today()
         target_month = date(today.year, today.month, 1)
@@ -280,9 +976,11 @@ def run_batch_prediction(target_month: Optional[date] = None):
     predictions = pipeline.run_monthly_predictions(
         target_month=target_month,
         save_to_db=True,
+        force=force,
+        pipelined=pipelined,
     )
 
-    summary = pipeline.get_prediction_summary(predictions)
+    summary = pipeline.get_prediction_summary(pipeline.last_result_set)
 
     logger.info("Prediction Summary:")
     logger.info(f"  Total sub-counties: {summary.get('total_subcounties', 0)}")
@@ -293,6 +991,30 @@ def run_batch_prediction(target_month: Optional[date] = None):
     return predictions, summary
 
 
+def run_backfill_predictions(
+    start_month: date,
+    end_month: date,
+    chunk_size: Optional[int] = None,
+    force: bool = False,
+) -> dict[str, int]:
+    pipeline = HungerPredictionPipeline()
+    pipeline.load_model()
+
+    completed = pipeline.run_backfill(
+        start_month=start_month,
+        end_month=end_month,
+        chunk_size=chunk_size,
+        force=force,
+    )
+
+    logger.info(
+        f"Backfill committed {sum(completed.values())} predictions "
+        f"across {len(completed)} months"
+    )
+
+    return completed
+
+
 if __name__ == "__main__":
     print("Testing Hunger Prediction Pipeline...")
 
@@ -317,7 +1039,9 @@ if __name__ == "__main__":
     print(f"  SPI-3: {features['spi_3month']}")
     print(f"  Drought severity: {features['drought_severity_index']}")
 
-    prediction = pipeline.make_prediction(sample_boundary, features, target)
+    prediction = pipeline.make_prediction(
+        sample_boundary, features, target, sequence=dummy_sequence
+    )
     print(f"\nPrediction:")
     print(f"  IPC Phase: {prediction['ipc_phase_predicted']}")
     print(f"  Risk Level: {prediction['risk_level']}")
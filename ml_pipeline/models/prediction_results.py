@@ -0,0 +1,194 @@
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import IPC_PHASE_MAPPING
+
+HIGH_RISK_PHASE = 3
+
+
+class PredictionResultSet:
+    def __init__(
+        self,
+        subcounty_codes: np.ndarray,
+        county_names: np.ndarray,
+        target_months: np.ndarray,
+        phases: np.ndarray,
+        probabilities: np.ndarray,
+        confidence: np.ndarray,
+        populations: np.ndarray,
+        food_insecure: np.ndarray,
+    ):
+        self.subcounty_codes = subcounty_codes
+        self.county_names = county_names
+        self.target_months = target_months
+        self.phases = phases
+        self.probabilities = probabilities
+        self.confidence = confidence
+        self.populations = populations
+        self.food_insecure = food_insecure
+
+    @classmethod
+    def empty(cls, num_classes: int = len(IPC_PHASE_MAPPING)) -> "PredictionResultSet":
+        return cls(
+            subcounty_codes=np.empty(0, dtype=str),
+            county_names=np.empty(0, dtype=str),
+            target_months=np.empty(0, dtype="datetime64[M]"),
+            phases=np.empty(0, dtype=np.int8),
+            probabilities=np.empty((0, num_classes), dtype=np.float32),
+            confidence=np.empty(0, dtype=np.float32),
+            populations=np.empty(0, dtype=np.int64),
+            food_insecure=np.empty(0, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_predictions(
+        cls,
+        predictions: list[dict],
+        boundaries: Optional[list[dict]] = None,
+    ) -> "PredictionResultSet":
+        if not predictions:
+            return cls.empty()
+
+        by_code = {b["subcounty_code"]: b for b in boundaries or []}
+        num_classes = len(predictions[0]["ipc_phase_probability"])
+
+        probabilities = np.array(
+            [
+                [p["ipc_phase_probability"][f"phase_{k+1}"] for k in range(num_classes)]
+                for p in predictions
+            ],
+            dtype=np.float32,
+        )
+
+        return cls(
+            subcounty_codes=np.array([p["subcounty_code"] for p in predictions], dtype=str),
+            county_names=np.array(
+                [by_code.get(p["subcounty_code"], {}).get("county_name", "") for p in predictions],
+                dtype=str,
+            ),
+            target_months=np.array(
+                [p["target_month"] for p in predictions], dtype="datetime64[D]"
+            ).astype("datetime64[M]"),
+            phases=np.array([p["ipc_phase_predicted"] for p in predictions], dtype=np.int8),
+            probabilities=probabilities,
+            confidence=np.array([p["confidence_score"] for p in predictions], dtype=np.float32),
+            populations=np.array(
+                [by_code.get(p["subcounty_code"], {}).get("population") or 0 for p in predictions],
+                dtype=np.int64,
+            ),
+            food_insecure=np.array(
+                [p["food_insecure_population"] for p in predictions], dtype=np.int64
+            ),
+        )
+
+    @classmethod
+    def concat(cls, result_sets: Iterable["PredictionResultSet"]) -> "PredictionResultSet":
+        result_sets = [r for r in result_sets if len(r)]
+        if not result_sets:
+            return cls.empty()
+
+        return cls(
+            subcounty_codes=np.concatenate([r.subcounty_codes for r in result_sets]),
+            county_names=np.concatenate([r.county_names for r in result_sets]),
+            target_months=np.concatenate([r.target_months for r in result_sets]),
+            phases=np.concatenate([r.phases for r in result_sets]),
+            probabilities=np.concatenate([r.probabilities for r in result_sets]),
+            confidence=np.concatenate([r.confidence for r in result_sets]),
+            populations=np.concatenate([r.populations for r in result_sets]),
+            food_insecure=np.concatenate([r.food_insecure for r in result_sets]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.phases)
+
+    @property
+    def risk_levels(self) -> np.ndarray:
+        lookup = np.array([""] + [IPC_PHASE_MAPPING[k] for k in sorted(IPC_PHASE_MAPPING)])
+        return lookup[self.phases]
+
+    def select(self, mask: np.ndarray) -> "PredictionResultSet":
+        return PredictionResultSet(
+            subcounty_codes=self.subcounty_codes[mask],
+            county_names=self.county_names[mask],
+            target_months=self.target_months[mask],
+            phases=self.phases[mask],
+            probabilities=self.probabilities[mask],
+            confidence=self.confidence[mask],
+            populations=self.populations[mask],
+            food_insecure=self.food_insecure[mask],
+        )
+
+    def filter(
+        self,
+        min_phase: Optional[int] = None,
+        county_name: Optional[str] = None,
+        subcounty_code: Optional[str] = None,
+        start_month: Optional[str] = None,
+        end_month: Optional[str] = None,
+    ) -> "PredictionResultSet":
+        mask = np.ones(len(self), dtype=bool)
+
+        if min_phase is not None:
+            mask &= self.phases >= min_phase
+        if county_name is not None:
+            mask &= self.county_names == county_name
+        if subcounty_code is not None:
+            mask &= self.subcounty_codes == subcounty_code
+        if start_month is not None:
+            mask &= self.target_months >= np.datetime64(start_month, "D").astype("datetime64[M]")
+        if end_month is not None:
+            mask &= self.target_months <= np.datetime64(end_month, "D").astype("datetime64[M]")
+
+        return self.select(mask)
+
+    def summary(self) -> dict:
+        if len(self) == 0:
+            return {}
+
+        phase_counts = np.bincount(self.phases, minlength=len(IPC_PHASE_MAPPING) + 1)
+
+        return {
+            "total_subcounties": len(self),
+            "risk_distribution": {
+                IPC_PHASE_MAPPING[phase]: int(phase_counts[phase])
+                for phase in sorted(IPC_PHASE_MAPPING)
+                if phase_counts[phase]
+            },
+            "average_ipc_phase": round(float(self.phases.mean()), 2),
+            "max_ipc_phase": int(self.phases.max()),
+            "total_food_insecure_population": int(self.food_insecure.sum()),
+            "high_risk_subcounties": self.subcounty_codes[
+                self.phases >= HIGH_RISK_PHASE
+            ].tolist(),
+        }
+
+    def group_by_county(self) -> dict[str, dict]:
+        if len(self) == 0:
+            return {}
+
+        counties, inverse = np.unique(self.county_names, return_inverse=True)
+        n_groups = len(counties)
+
+        counts = np.bincount(inverse, minlength=n_groups)
+        phase_sums = np.bincount(inverse, weights=self.phases, minlength=n_groups)
+        max_phases = np.zeros(n_groups, dtype=np.int8)
+        np.maximum.at(max_phases, inverse, self.phases)
+        food_insecure = np.bincount(inverse, weights=self.food_insecure, minlength=n_groups)
+        high_risk = np.bincount(
+            inverse, weights=self.phases >= HIGH_RISK_PHASE, minlength=n_groups
+        )
+
+        return {
+            str(county): {
+                "total_subcounties": int(counts[i]),
+                "average_ipc_phase": round(float(phase_sums[i] / counts[i]), 2),
+                "max_ipc_phase": int(max_phases[i]),
+                "total_food_insecure_population": int(food_insecure[i]),
+                "high_risk_count": int(high_risk[i]),
+            }
+            for i, county in enumerate(counties)
+        }
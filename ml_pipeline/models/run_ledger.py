@@ -0,0 +1,282 @@
+import hashlib
+import json
+import logging
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import PROCESSED_DIR
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def default_ledger_path() -> Path:
+    return PROCESSED_DIR / "run_ledger.sqlite"
+
+
+def compute_input_checksum(rasters: list[dict]) -> Optional[str]:
+    if not rasters:
+        return None
+
+    digest = hashlib.sha256()
+
+    for raster in rasters:
+        checksum = raster.get("checksum")
+        if not checksum:
+            file_path = raster.get("file_path")
+            if not file_path or not Path(file_path).exists():
+                return None
+            stat = Path(file_path).stat()
+            checksum = f"{file_path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+        digest.update(f"{raster.get('start_date')}|{checksum}\n".encode())
+
+    return digest.hexdigest()
+
+
+class RunLedger:
+    def __init__(self, path: Optional[Path] = None):
+        if path is None:
+            path = default_ledger_path()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS run_ledger (
+                subcounty_code TEXT NOT NULL,
+                target_month TEXT NOT NULL,
+                model_version TEXT NOT NULL,
+                input_checksum TEXT NOT NULL,
+                prediction TEXT NOT NULL,
+                completed_at TEXT NOT NULL,
+                PRIMARY KEY (subcounty_code, target_month, model_version)
+            )
+            """
+        )
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+                target_month TEXT NOT NULL,
+                model_version TEXT NOT NULL,
+                chunk_size INTEGER NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                completed_at TEXT NOT NULL,
+                input_checksum TEXT,
+                PRIMARY KEY (target_month, model_version, chunk_size, chunk_index)
+            )
+            """
+        )
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS backfill_months (
+                target_month TEXT NOT NULL,
+                model_version TEXT NOT NULL,
+                n_predictions INTEGER NOT NULL,
+                completed_at TEXT NOT NULL,
+                input_checksum TEXT,
+                PRIMARY KEY (target_month, model_version)
+            )
+            """
+        )
+        for table in ("backfill_checkpoints", "backfill_months"):
+            columns = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            if "input_checksum" not in columns:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN input_checksum TEXT")
+        self.conn.commit()
+
+    def lookup(
+        self,
+        subcounty_code: str,
+        target_month: date,
+        model_version: str,
+        input_checksum: Optional[str],
+    ) -> Optional[dict]:
+        if input_checksum is None:
+            return None
+
+        row = self.conn.execute(
+            "SELECT prediction FROM run_ledger "
+            "WHERE subcounty_code = ? AND target_month = ? "
+            "AND model_version = ? AND input_checksum = ?",
+            (subcounty_code, target_month.isoformat(), model_version, input_checksum),
+        ).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def record(
+        self,
+        subcounty_code: str,
+        target_month: date,
+        model_version: str,
+        input_checksum: Optional[str],
+        prediction: dict,
+    ):
+        if input_checksum is None:
+            return
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO run_ledger VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                subcounty_code,
+                target_month.isoformat(),
+                model_version,
+                input_checksum,
+                json.dumps(prediction, default=str),
+                datetime.now().isoformat(),
+            ),
+        )
+        self.conn.commit()
+
+    def is_chunk_committed(
+        self,
+        target_month: date,
+        model_version: str,
+        chunk_size: int,
+        chunk_index: int,
+        input_checksum: Optional[str],
+    ) -> bool:
+        if input_checksum is None:
+            return False
+
+        row = self.conn.execute(
+            "SELECT 1 FROM backfill_checkpoints "
+            "WHERE target_month = ? AND model_version = ? "
+            "AND chunk_size = ? AND chunk_index = ? AND input_checksum = ?",
+            (target_month.isoformat(), model_version, chunk_size, chunk_index, input_checksum),
+        ).fetchone()
+        return row is not None
+
+    def record_many(
+        self,
+        target_month: date,
+        model_version: str,
+        input_checksum: Optional[str],
+        predictions: list[dict],
+    ):
+        if input_checksum is None:
+            return
+
+        with self.conn:
+            self._insert_predictions(
+                target_month, model_version, input_checksum, predictions,
+                datetime.now().isoformat(),
+            )
+
+    def _insert_predictions(
+        self,
+        target_month: date,
+        model_version: str,
+        input_checksum: str,
+        predictions: list[dict],
+        completed_at: str,
+    ):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO run_ledger VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    p["subcounty_code"],
+                    target_month.isoformat(),
+                    model_version,
+                    input_checksum,
+                    json.dumps(p, default=str),
+                    completed_at,
+                )
+                for p in predictions
+            ],
+        )
+
+    def commit_chunk(
+        self,
+        target_month: date,
+        model_version: str,
+        chunk_size: int,
+        chunk_index: int,
+        input_checksum: Optional[str],
+        predictions: list[dict],
+    ):
+        completed_at = datetime.now().isoformat()
+
+        with self.conn:
+            if input_checksum is not None:
+                self._insert_predictions(
+                    target_month, model_version, input_checksum, predictions, completed_at
+                )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO backfill_checkpoints VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    target_month.isoformat(),
+                    model_version,
+                    chunk_size,
+                    chunk_index,
+                    completed_at,
+                    input_checksum,
+                ),
+            )
+
+    def is_month_committed(
+        self, target_month: date, model_version: str, input_checksum: Optional[str]
+    ) -> bool:
+        if input_checksum is None:
+            return False
+
+        row = self.conn.execute(
+            "SELECT 1 FROM backfill_months "
+            "WHERE target_month = ? AND model_version = ? AND input_checksum = ?",
+            (target_month.isoformat(), model_version, input_checksum),
+        ).fetchone()
+        return row is not None
+
+    def commit_month(
+        self,
+        target_month: date,
+        model_version: str,
+        n_predictions: int,
+        input_checksum: Optional[str],
+    ):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO backfill_months VALUES (?, ?, ?, ?, ?)",
+                (
+                    target_month.isoformat(),
+                    model_version,
+                    n_predictions,
+                    datetime.now().isoformat(),
+                    input_checksum,
+                ),
+            )
+            self.conn.execute(
+                "DELETE FROM backfill_checkpoints WHERE target_month = ? AND model_version = ?",
+                (target_month.isoformat(), model_version),
+            )
+
+    def invalidate(
+        self,
+        target_month: Optional[date] = None,
+        model_version: Optional[str] = None,
+    ) -> int:
+        clauses = []
+        params = []
+        if target_month is not None:
+            clauses.append("target_month = ?")
+            params.append(target_month.isoformat())
+        if model_version is not None:
+            clauses.append("model_version = ?")
+            params.append(model_version)
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.conn:
+            cursor = self.conn.execute(f"DELETE FROM run_ledger{where}", params)
+            self.conn.execute(f"DELETE FROM backfill_checkpoints{where}", params)
+            self.conn.execute(f"DELETE FROM backfill_months{where}", params)
+
+        logger.info(f"Invalidated {cursor.rowcount} ledger entries")
+        return cursor.rowcount
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,316 @@
+import logging
+import math
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import tensorflow as tf
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import CNN_CONFIG
+from preprocessing.raster_processor import open_frame_archive, rasterize_zone_masks
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+
+def sliding_window_starts(
+    num_frames: int,
+    sequence_length: int = None,
+    stride: int = 1,
+) -> np.ndarray:
+    if sequence_length is None:
+        sequence_length = CNN_CONFIG["time_steps"]
+
+    return np.arange(0, num_frames - sequence_length + 1, stride, dtype=np.int64)
+
+
+def representative_windows(
+    archive_path: Path,
+    num_samples: int = 100,
+    sequence_length: int = None,
+    seed: Optional[int] = None,
+):
+    if sequence_length is None:
+        sequence_length = CNN_CONFIG["time_steps"]
+
+    frames, _ = open_frame_archive(archive_path)
+    starts = sliding_window_starts(len(frames), sequence_length)
+
+    rng = np.random.default_rng(seed)
+    chosen = rng.choice(starts, size=min(num_samples, len(starts)), replace=False)
+
+    for start in np.sort(chosen):
+        yield np.asarray(frames[start : start + sequence_length], dtype=np.float32)
+
+
+def build_window_dataset(
+    archive_path: Path,
+    window_starts: np.ndarray,
+    labels: np.ndarray,
+    zone_indices: Optional[np.ndarray] = None,
+    zone_masks: Optional[np.ndarray] = None,
+    sequence_length: int = None,
+    batch_size: int = None,
+    shuffle: bool = True,
+    shuffle_buffer: int = None,
+    cache_path: Optional[str] = None,
+    block_size: int = 64,
+    seed: Optional[int] = None,
+) -> tf.data.Dataset:
+    if sequence_length is None:
+        sequence_length = CNN_CONFIG["time_steps"]
+    if batch_size is None:
+        batch_size = CNN_CONFIG["batch_size"]
+    if shuffle_buffer is None:
+        shuffle_buffer = CNN_CONFIG["shuffle_buffer_size"]
+
+    frames, _ = open_frame_archive(archive_path)
+    frame_shape = tuple(frames.shape[1:])
+
+    window_starts = np.asarray(window_starts, dtype=np.int64)
+    labels = np.asarray(labels, dtype=np.int64)
+
+    if len(window_starts) != len(labels):
+        raise ValueError(
+            f"Got {len(window_starts)} windows but {len(labels)} labels"
+        )
+    if (zone_indices is None) != (zone_masks is None):
+        raise ValueError("zone_indices and zone_masks must be given together")
+    if zone_indices is None:
+        zone_indices = np.full(len(window_starts), -1, dtype=np.int64)
+    else:
+        zone_indices = np.asarray(zone_indices, dtype=np.int64)
+        zone_masks = np.asarray(zone_masks, dtype=np.float32)[..., np.newaxis]
+        if len(zone_indices) != len(labels):
+            raise ValueError(
+                f"Got {len(zone_indices)} zone indices but {len(labels)} labels"
+            )
+    if len(window_starts) and window_starts.max() + sequence_length > len(frames):
+        raise ValueError(
+            f"Window exceeds frame archive ({len(frames)} frames) at {archive_path}"
+        )
+
+    def load_window(start, zone):
+        start = int(start)
+        window = np.asarray(frames[start : start + sequence_length], dtype=np.float32)
+        if zone >= 0:
+            window = window * zone_masks[zone]
+        return window
+
+    def load(start, zone, label):
+        window = tf.numpy_function(load_window, [start, zone], tf.float32)
+        window.set_shape((sequence_length,) + frame_shape)
+        return window, label
+
+    starts_tensor = tf.constant(window_starts)
+    zones_tensor = tf.constant(zone_indices)
+    labels_tensor = tf.constant(labels)
+
+    def block_slices(block_id):
+        begin = block_id * block_size
+        end = tf.minimum(begin + block_size, len(window_starts))
+        return tf.data.Dataset.from_tensor_slices(
+            (starts_tensor[begin:end], zones_tensor[begin:end], labels_tensor[begin:end])
+        )
+
+    num_blocks = max(1, math.ceil(len(window_starts) / block_size))
+    shuffle_indices = shuffle and cache_path is None
+
+    dataset = tf.data.Dataset.range(num_blocks)
+    if shuffle_indices:
+        dataset = dataset.shuffle(num_blocks, seed=seed, reshuffle_each_iteration=True)
+
+    dataset = dataset.interleave(
+        block_slices,
+        cycle_length=min(num_blocks, 8),
+        num_parallel_calls=AUTOTUNE,
+        deterministic=not shuffle,
+    )
+
+    if shuffle_indices:
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+
+    dataset = dataset.map(load, num_parallel_calls=AUTOTUNE, deterministic=not shuffle)
+
+    if cache_path is not None:
+        dataset = dataset.cache(cache_path)
+        if shuffle:
+            dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+
+    dataset = dataset.batch(batch_size).prefetch(AUTOTUNE)
+
+    logger.info(
+        f"Built window dataset with {len(window_starts)} windows "
+        f"from {len(frames)} frames in {archive_path}"
+    )
+    return dataset
+
+
+def _as_days(values) -> np.ndarray:
+    return np.asarray([str(v)[:10] for v in values], dtype="datetime64[D]")
+
+
+def build_training_index(
+    archive_path: Path,
+    ipc_rows: list[dict],
+    zone_codes: Optional[list[str]] = None,
+    sequence_length: int = None,
+    lead_months: int = 0,
+) -> dict[str, np.ndarray]:
+    if sequence_length is None:
+        sequence_length = CNN_CONFIG["time_steps"]
+
+    _, metadata = open_frame_archive(archive_path)
+    frame_starts = _as_days(metadata["start_dates"])
+    if np.any(frame_starts[1:] < frame_starts[:-1]):
+        raise ValueError(f"Frame archive {archive_path} is not in time order")
+
+    codes = np.array([r["subcounty_code"] for r in ipc_rows], dtype=str)
+    period_starts = _as_days([r["analysis_period_start"] for r in ipc_rows])
+    phases = np.array([r["ipc_phase"] for r in ipc_rows], dtype=np.int64)
+
+    if zone_codes is None:
+        zone_codes = np.unique(codes)
+    else:
+        zone_codes = np.unique(np.asarray(zone_codes, dtype=str))
+
+    zone_indices = np.searchsorted(zone_codes, codes)
+    in_zones = zone_indices < len(zone_codes)
+    in_zones[in_zones] = zone_codes[zone_indices[in_zones]] == codes[in_zones]
+
+    window_ends = np.searchsorted(frame_starts, period_starts, side="left") - 1 - lead_months
+    window_starts = window_ends - sequence_length + 1
+
+    valid = in_zones & (window_starts >= 0) & (phases >= 1) & (phases <= 5)
+
+    order = np.lexsort((zone_indices[valid], window_starts[valid]))
+    index = {
+        "window_starts": window_starts[valid][order].astype(np.int64),
+        "zone_indices": zone_indices[valid][order].astype(np.int32),
+        "labels": (phases[valid][order] - 1).astype(np.int64),
+        "label_dates": period_starts[valid][order],
+        "zone_codes": zone_codes,
+    }
+
+    dropped = len(ipc_rows) - int(valid.sum())
+    logger.info(
+        f"Mapped {int(valid.sum())} IPC labels onto {len(frame_starts)} frames "
+        f"and {len(zone_codes)} zones ({dropped} dropped)"
+    )
+    return index
+
+
+def split_training_index(
+    index: dict[str, np.ndarray],
+    val_fraction: float = 0.2,
+    by_time: bool = True,
+    seed: Optional[int] = None,
+) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray]]:
+    n_samples = len(index["labels"])
+    n_val = int(round(n_samples * val_fraction))
+
+    if by_time and 0 < n_val < n_samples:
+        label_dates = index["label_dates"]
+        cutoff_date = np.sort(label_dates)[n_samples - n_val]
+        cutoff_window = index["window_starts"][label_dates >= cutoff_date].min()
+        is_val = index["window_starts"] >= cutoff_window
+        train_pos = np.flatnonzero(~is_val)
+        val_pos = np.flatnonzero(is_val)
+    elif by_time:
+        positions = np.arange(n_samples)
+        train_pos, val_pos = positions[: n_samples - n_val], positions[n_samples - n_val :]
+    else:
+        positions = np.random.default_rng(seed).permutation(n_samples)
+        train_pos = np.sort(positions[: n_samples - n_val])
+        val_pos = np.sort(positions[n_samples - n_val :])
+
+    def take(pos):
+        split = {k: v[pos] for k, v in index.items() if k != "zone_codes"}
+        split["zone_codes"] = index["zone_codes"]
+        return split
+
+    return take(train_pos), take(val_pos)
+
+
+def build_training_datasets(
+    archive_path: Path,
+    ipc_rows: list[dict],
+    boundaries: list[dict],
+    zone_codes: Optional[list[str]] = None,
+    val_fraction: float = 0.2,
+    sequence_length: int = None,
+    batch_size: int = None,
+    seed: Optional[int] = None,
+    cache_dir: Optional[Path] = None,
+) -> tuple[tf.data.Dataset, tf.data.Dataset]:
+    if zone_codes is None:
+        zone_codes = [b["subcounty_code"] for b in boundaries if b.get("geometry_geojson")]
+
+    index = build_training_index(
+        archive_path, ipc_rows, zone_codes=zone_codes, sequence_length=sequence_length
+    )
+
+    frames, _ = open_frame_archive(archive_path)
+    by_code = {b["subcounty_code"]: b for b in boundaries}
+    zone_masks = rasterize_zone_masks(
+        [by_code.get(code, {}) for code in index["zone_codes"]], frames.shape[1:3]
+    )
+    empty_zones = np.flatnonzero(zone_masks.reshape(len(zone_masks), -1).max(axis=1) == 0)
+    if len(empty_zones):
+        keep = ~np.isin(index["zone_indices"], empty_zones)
+        logger.warning(
+            f"Dropping {int((~keep).sum())} labels for {len(empty_zones)} zones "
+            "with no pixels on the frame grid"
+        )
+        index = {k: (v if k == "zone_codes" else v[keep]) for k, v in index.items()}
+
+    train_index, val_index = split_training_index(index, val_fraction, seed=seed)
+
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    train_dataset = build_window_dataset(
+        archive_path,
+        train_index["window_starts"],
+        train_index["labels"],
+        zone_indices=train_index["zone_indices"],
+        zone_masks=zone_masks,
+        sequence_length=sequence_length,
+        batch_size=batch_size,
+        cache_path=str(cache_dir / "train") if cache_dir is not None else None,
+        seed=seed,
+    )
+    val_dataset = build_window_dataset(
+        archive_path,
+        val_index["window_starts"],
+        val_index["labels"],
+        zone_indices=val_index["zone_indices"],
+        zone_masks=zone_masks,
+        sequence_length=sequence_length,
+        batch_size=batch_size,
+        shuffle=False,
+        cache_path=str(cache_dir / "val") if cache_dir is not None else None,
+    )
+
+    return train_dataset, val_dataset
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive_path = Path(tmp) / "frames_monthly.npy"
+        np.save(archive_path, np.random.rand(48, 64, 64, 1).astype(np.float32))
+        with open(archive_path.with_suffix(".json"), "w") as f:
+            f.write("{}")
+
+        starts = sliding_window_starts(48)
+        labels = np.random.randint(0, 5, len(starts))
+
+        dataset = build_window_dataset(archive_path, starts, labels, batch_size=8)
+        for windows, batch_labels in dataset.take(1):
+            print(f"Window batch shape: {windows.shape}, labels: {batch_labels.numpy()}")
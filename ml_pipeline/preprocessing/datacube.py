@@ -0,0 +1,351 @@
+import json
+import logging
+import re
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+import dask
+import dask.array as dsa
+import numpy as np
+import rasterio
+import xarray as xr
+from rasterio.features import rasterize
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+from rasterio.windows import transform as window_transform
+from shapely.geometry import shape
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import RASTER_DIR, CUBE_CONFIG
+from regions import get_region
+from preprocessing.tiling import bbox_window
+import instrumentation
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHIRPS_FILENAME = re.compile(r"chirps-v2\.0\.(\d{4})\.(\d{2})(?:\.([123]))?\.tif$")
+DEKAD_START_DAY = {1: 1, 2: 11, 3: 21}
+
+
+def _glob_rasters(directory: Path, data_type: str) -> dict[date, Path]:
+    found = {}
+
+    for path in directory.glob("chirps-v2.0.*.tif"):
+        match = CHIRPS_FILENAME.search(path.name)
+        if not match:
+            continue
+        year, month, dekad = match.groups()
+        if (dekad is None) != (data_type == "monthly"):
+            continue
+        day = DEKAD_START_DAY[int(dekad)] if dekad else 1
+        found[date(int(year), int(month), day)] = path
+
+    return found
+
+
+def _recorded_rasters(
+    data_type: str, start: Optional[date], end: Optional[date]
+) -> dict[date, Path]:
+    from db.supabase_client import get_raster_metadata
+
+    try:
+        records = get_raster_metadata(
+            data_type,
+            start.isoformat() if start else None,
+            end.isoformat() if end else None,
+        )
+    except Exception as e:
+        logger.warning(f"Could not read raster metadata, falling back to a directory scan: {e}")
+        return {}
+
+    return {
+        date.fromisoformat(str(r["start_date"])[:10]): Path(r["file_path"])
+        for r in records
+        if r.get("file_path") and Path(r["file_path"]).exists()
+    }
+
+
+def discover_rasters(
+    data_type: str = "monthly",
+    raster_dir: Optional[Path] = None,
+    region: Optional[str | dict] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> list[tuple[date, Path]]:
+    if raster_dir is not None:
+        found = _glob_rasters(raster_dir / data_type, data_type)
+    else:
+        archive_dir = RASTER_DIR / "cog" / get_region(region)["key"] / data_type
+        found = {
+            **_glob_rasters(RASTER_DIR / data_type, data_type),
+            **_recorded_rasters(data_type, start, end),
+            **_glob_rasters(archive_dir, data_type),
+        }
+
+    return sorted(
+        (d, p) for d, p in found.items()
+        if (start is None or d >= start) and (end is None or d <= end)
+    )
+
+
+def _read_block(path: str, row_off: int, col_off: int, height: int, width: int) -> np.ndarray:
+    with rasterio.open(path) as src:
+        data = src.read(1, window=Window(col_off, row_off, width, height)).astype(np.float32)
+    data[~(data >= 0)] = np.nan
+    return data[np.newaxis]
+
+
+def _split(length: int, size: int) -> list[tuple[int, int]]:
+    return [(start, min(size, length - start)) for start in range(0, length, size)]
+
+
+class CHIRPSCube:
+    def __init__(self, data: xr.DataArray, region: Optional[str | dict] = None):
+        self.data = data
+        self.region = get_region(region)
+
+    @classmethod
+    def from_geotiffs(
+        cls,
+        region: Optional[str | dict] = None,
+        data_type: str = "monthly",
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        chunks: Optional[dict] = None,
+        raster_dir: Optional[Path] = None,
+    ) -> "CHIRPSCube":
+        region = get_region(region)
+        chunks = {**CUBE_CONFIG["chunks"], **(chunks or {})}
+
+        rasters = discover_rasters(data_type, raster_dir, region, start, end)
+        if not rasters:
+            raise FileNotFoundError(f"No {data_type} CHIRPS rasters found for the cube")
+
+        grid = None
+        offsets = []
+        for _, path in rasters:
+            with rasterio.open(path) as src:
+                row_off, col_off, height, width = bbox_window(src, region["bbox"])
+                transform = window_transform(Window(col_off, row_off, width, height), src.transform)
+
+            if grid is None:
+                grid = (transform, height, width)
+            elif (height, width) != grid[1:] or not transform.almost_equals(grid[0]):
+                raise ValueError(
+                    f"{path} does not share the region grid of {rasters[0][1]}; "
+                    "mixed archives must be resampled to a common grid first"
+                )
+            offsets.append((row_off, col_off))
+        transform, height, width = grid
+
+        row_blocks = _split(height, chunks["y"])
+        col_blocks = _split(width, chunks["x"])
+        read = dask.delayed(_read_block, pure=True)
+
+        blocks = [
+            [
+                [
+                    dsa.from_delayed(
+                        read(str(path), row_off + r0, col_off + c0, h, w),
+                        shape=(1, h, w),
+                        dtype=np.float32,
+                    )
+                    for c0, w in col_blocks
+                ]
+                for r0, h in row_blocks
+            ]
+            for (_, path), (row_off, col_off) in zip(rasters, offsets)
+        ]
+        stacked = dsa.block(blocks).rechunk({0: chunks["time"]})
+
+        data = xr.DataArray(
+            stacked,
+            dims=("time", "y", "x"),
+            coords={
+                "time": np.array([np.datetime64(d, "ns") for d, _ in rasters]),
+                "y": transform.f + (np.arange(height) + 0.5) * transform.e,
+                "x": transform.c + (np.arange(width) + 0.5) * transform.a,
+            },
+            name="precip",
+            attrs={"units": "mm", "data_type": data_type},
+        )
+        logger.info(
+            f"Opened {data_type} CHIRPS cube for {region['name']}: "
+            f"{len(rasters)} x {height} x {width} in {stacked.npartitions} chunks"
+        )
+        return cls(data, region)
+
+    @classmethod
+    def from_netcdf(
+        cls,
+        path: Path,
+        region: Optional[str | dict] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        chunks: Optional[dict] = None,
+    ) -> "CHIRPSCube":
+        region = get_region(region)
+        bbox = region["bbox"]
+        chunks = {**CUBE_CONFIG["chunks"], **(chunks or {})}
+
+        dataset = xr.open_dataset(
+            path,
+            chunks={"time": chunks["time"], "latitude": chunks["y"], "longitude": chunks["x"]},
+        )
+        precip = dataset["precip"].rename({"latitude": "y", "longitude": "x"})
+        precip = precip.sortby("y", ascending=False).sel(
+            y=slice(bbox["max_lat"], bbox["min_lat"]),
+            x=slice(bbox["min_lng"], bbox["max_lng"]),
+            time=slice(start, end),
+        )
+        precip = precip.where(precip >= 0).astype(np.float32)
+        precip.attrs.update({"units": "mm", "data_type": "netcdf"})
+
+        logger.info(f"Opened CHIRPS NetCDF cube {path} for {region['name']}: {dict(precip.sizes)}")
+        return cls(precip, region)
+
+    @property
+    def transform(self):
+        y = self.data["y"].values
+        x = self.data["x"].values
+        x_res = float(x[1] - x[0]) if len(x) > 1 else 0.05
+        y_res = float(y[0] - y[1]) if len(y) > 1 else 0.05
+        return from_origin(x[0] - x_res / 2, y[0] + y_res / 2, x_res, y_res)
+
+    def compute(self, obj=None, scheduler: Optional[str] = None, workers: Optional[int] = None):
+        obj = self.data if obj is None else obj
+        scheduler = scheduler or CUBE_CONFIG["scheduler"]
+        workers = workers or CUBE_CONFIG["workers"]
+
+        with instrumentation.timer("datacube_compute", region=self.region["key"]):
+            return obj.compute(scheduler=scheduler, num_workers=workers)
+
+    def climatology(self) -> xr.Dataset:
+        by_month = self.data.groupby("time.month")
+        return xr.Dataset(
+            {
+                "mean": by_month.mean("time"),
+                "std": by_month.std("time"),
+                "count": by_month.count("time"),
+            }
+        )
+
+    def anomalies(self, climatology: Optional[xr.Dataset] = None) -> xr.DataArray:
+        if climatology is None:
+            climatology = self.climatology()
+        return self.data.groupby("time.month") - climatology["mean"]
+
+    def to_target_grid(self, target_shape: tuple, fill_missing: bool = True) -> "CHIRPSCube":
+        from preprocessing.raster_processor import RasterProcessor
+
+        processor = RasterProcessor(self.region)
+        target_shape = tuple(target_shape)
+
+        def resample_block(block: np.ndarray) -> np.ndarray:
+            out = np.empty((block.shape[0],) + target_shape, dtype=np.float32)
+            for i, frame in enumerate(block):
+                frame = np.where(np.isnan(frame), -9999.0, frame)
+                if fill_missing:
+                    frame = processor.fill_missing_data(frame)
+                out[i] = processor.resample_to_target_shape(frame, target_shape)
+            out[out < 0] = np.nan
+            return out
+
+        frames = self.data.data.rechunk({1: -1, 2: -1})
+        resampled = frames.map_blocks(
+            resample_block,
+            chunks=(frames.chunks[0], (target_shape[0],), (target_shape[1],)),
+            dtype=np.float32,
+        )
+
+        y = self.data["y"].values
+        x = self.data["x"].values
+        data = xr.DataArray(
+            resampled,
+            dims=("time", "y", "x"),
+            coords={
+                "time": self.data["time"],
+                "y": np.linspace(y[0], y[-1], target_shape[0]),
+                "x": np.linspace(x[0], x[-1], target_shape[1]),
+            },
+            name=self.data.name,
+            attrs=self.data.attrs,
+        )
+        return CHIRPSCube(data, self.region)
+
+    def fit_spi(self, calculator) -> dict[int, dict[str, np.ndarray]]:
+        fields = calculator.GRID_FIELDS
+        months = self.data["time"].dt.month.values
+        history = self.data.fillna(-1.0)
+
+        def fit_block(block: np.ndarray) -> tuple:
+            grid = calculator._fit_month_grid(np.moveaxis(block, -1, 0).astype(np.float64))
+            return tuple(grid[field] for field in fields)
+
+        lazy = {}
+        for month in np.unique(months):
+            subset = history.isel(time=np.flatnonzero(months == month)).chunk({"time": -1})
+            lazy[int(month)] = xr.apply_ufunc(
+                fit_block,
+                subset,
+                input_core_dims=[["time"]],
+                output_core_dims=[[] for _ in fields],
+                dask="parallelized",
+                output_dtypes=[bool if f == "use_gamma" else np.float32 for f in fields],
+            )
+
+        with instrumentation.timer("datacube_compute", region=self.region["key"]):
+            (computed,) = dask.compute(
+                lazy, scheduler=CUBE_CONFIG["scheduler"], num_workers=CUBE_CONFIG["workers"]
+            )
+
+        calculator.parameter_grids = {
+            month: {field: arrays[i].values for i, field in enumerate(fields)}
+            for month, arrays in computed.items()
+        }
+        logger.info(
+            f"Fitted SPI grids for {len(calculator.parameter_grids)} months "
+            f"from a {self.data.sizes['time']}-step cube"
+        )
+        return calculator.parameter_grids
+
+    def zone_labels(self, boundaries: list[dict]) -> xr.DataArray:
+        shapes = [
+            (shape(json.loads(g) if isinstance(g, str) else g), i)
+            for i, g in enumerate((b["geometry_geojson"] for b in boundaries), start=1)
+        ]
+        labels = rasterize(
+            shapes,
+            out_shape=(self.data.sizes["y"], self.data.sizes["x"]),
+            transform=self.transform,
+            fill=0,
+            dtype="int32",
+        )
+        return xr.DataArray(
+            labels,
+            dims=("y", "x"),
+            coords={"y": self.data["y"], "x": self.data["x"]},
+            name="zone",
+        )
+
+    def zonal_mean(self, boundaries: list[dict], key: str = "subcounty_code") -> xr.DataArray:
+        zones = self.zone_labels(boundaries)
+        means = self.data.groupby(zones).mean()
+        means = means.drop_sel(zone=0, errors="ignore")
+
+        codes = [boundaries[int(z) - 1].get(key) for z in means["zone"].values]
+        return means.assign_coords(zone=codes).rename(zone=key)
+
+
+if __name__ == "__main__":
+    rasters = discover_rasters("monthly")
+    print(f"Found {len(rasters)} monthly CHIRPS rasters")
+
+    if rasters:
+        cube = CHIRPSCube.from_geotiffs()
+        print(cube.data)
+        climatology = cube.compute(cube.climatology())
+        print(climatology)
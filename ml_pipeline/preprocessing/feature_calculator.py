@@ -4,12 +4,11 @@ from pathlib import Path
 from typing import Optional
 
 import numpy as np
-from scipy import stats
 
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from config import DROUGHT_THRESHOLDS
-from db.supabase_client import get_supabase_client, insert_cnn_features
+from db.supabase_client import insert_cnn_features
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,7 +16,6 @@ logger = logging.getLogger(__name__)
 
 class FeatureCalculator:
     def __init__(self):
-        self.supabase = get_supabase_client()
         self.drought_thresholds = DROUGHT_THRESHOLDS
 
     def calculate_cumulative_precipitation(
@@ -48,6 +46,8 @@ class FeatureCalculator:
         if len(valid_values) < 10:
             return 0.0
 
+        from scipy import stats
+
         try:
             params = stats.gamma.fit(valid_values, floc=0)
             prob = stats.gamma.cdf(max(precip_value, 0.001), *params)
@@ -112,6 +112,8 @@ class FeatureCalculator:
         if len(precip_series) < 3:
             return 0.0
 
+        from scipy import stats
+
         x = np.arange(len(precip_series))
         try:
             slope, _, _, _, _ = stats.linregress(x, precip_series)
@@ -161,7 +163,7 @@ class FeatureCalculator:
         spatial_precip_current: np.ndarray,
         historical_monthly_precip: dict[int, np.ndarray],
         normal_values: np.ndarray,
-        cnn_feature_vector: list[float],
+        cnn_feature_vector: np.ndarray | list[float],
         model_version: str = "v1.0",
     ) -> dict:
         current_month = feature_date.month
@@ -0,0 +1,315 @@
+import json
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import rasterio
+from rasterio.features import rasterize
+from rasterio.windows import Window, from_bounds
+from rasterio.windows import transform as window_transform
+from scipy import ndimage
+from shapely.geometry import shape
+
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from config import NORMALIZATION_CONFIG, TILING_CONFIG
+from regions import get_region
+import instrumentation
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Tile:
+    def __init__(
+        self,
+        index: int,
+        rows: tuple[int, int],
+        cols: tuple[int, int],
+        shape: tuple,
+        halo: int,
+    ):
+        self.index = index
+        self.row0, self.row1 = rows
+        self.col0, self.col1 = cols
+        self.halo_row0 = max(self.row0 - halo, 0)
+        self.halo_row1 = min(self.row1 + halo, shape[0])
+        self.halo_col0 = max(self.col0 - halo, 0)
+        self.halo_col1 = min(self.col1 + halo, shape[1])
+
+    @property
+    def core(self) -> tuple[slice, slice]:
+        return (
+            slice(self.row0 - self.halo_row0, self.row1 - self.halo_row0),
+            slice(self.col0 - self.halo_col0, self.col1 - self.halo_col0),
+        )
+
+    def __repr__(self) -> str:
+        return f"Tile({self.index}, rows={self.row0}:{self.row1}, cols={self.col0}:{self.col1})"
+
+
+def plan_tiles(shape: tuple, tile_size: int, halo: int) -> list[Tile]:
+    tiles = []
+    for row0 in range(0, shape[0], tile_size):
+        for col0 in range(0, shape[1], tile_size):
+            rows = (row0, min(row0 + tile_size, shape[0]))
+            cols = (col0, min(col0 + tile_size, shape[1]))
+            tiles.append(Tile(len(tiles), rows, cols, shape, halo))
+    return tiles
+
+
+def resample_coordinates(source_size: int, target_size: int) -> np.ndarray:
+    if target_size <= 1:
+        return np.zeros(max(target_size, 0))
+    return np.arange(target_size) * ((source_size - 1) / (target_size - 1))
+
+
+def bbox_window(src, bbox: dict) -> tuple[int, int, int, int]:
+    window = from_bounds(
+        bbox["min_lng"],
+        bbox["min_lat"],
+        bbox["max_lng"],
+        bbox["max_lat"],
+        transform=src.transform,
+    ).round_offsets().round_lengths()
+    window = window.intersection(Window(0, 0, src.width, src.height))
+
+    return int(window.row_off), int(window.col_off), int(window.height), int(window.width)
+
+
+_zones: list = []
+_zone_bounds: Optional[np.ndarray] = None
+
+
+def _init_tile_worker(geometries: list[dict]):
+    global _zones, _zone_bounds
+    _zones = [shape(json.loads(g) if isinstance(g, str) else g) for g in geometries]
+    _zone_bounds = (
+        np.array([z.bounds for z in _zones], dtype=np.float64)
+        if _zones
+        else np.empty((0, 4))
+    )
+
+
+def _zone_statistics(raw: np.ndarray, core_transform, n_zones: int) -> Optional[dict]:
+    if not _zones:
+        return None
+
+    height, width = raw.shape
+    min_x, max_y = core_transform * (0, 0)
+    max_x, min_y = core_transform * (width, height)
+
+    overlapping = np.flatnonzero(
+        (_zone_bounds[:, 0] <= max_x)
+        & (_zone_bounds[:, 2] >= min_x)
+        & (_zone_bounds[:, 1] <= max_y)
+        & (_zone_bounds[:, 3] >= min_y)
+    )
+    if len(overlapping) == 0:
+        return None
+
+    labels = rasterize(
+        [(_zones[i], int(i) + 1) for i in overlapping],
+        out_shape=raw.shape,
+        transform=core_transform,
+        fill=0,
+        dtype="int32",
+    ).ravel()
+    values = raw.ravel()
+    valid = (labels > 0) & (values >= 0)
+
+    minimum = np.full(n_zones + 1, np.inf)
+    maximum = np.full(n_zones + 1, -np.inf)
+    np.minimum.at(minimum, labels[valid], values[valid])
+    np.maximum.at(maximum, labels[valid], values[valid])
+
+    return {
+        "total": np.bincount(labels, minlength=n_zones + 1),
+        "count": np.bincount(labels[valid], minlength=n_zones + 1),
+        "sum": np.bincount(labels[valid], weights=values[valid], minlength=n_zones + 1),
+        "min": minimum,
+        "max": maximum,
+    }
+
+
+def _process_tile(
+    input_path: str,
+    region_window: tuple[int, int, int, int],
+    tile: Tile,
+    target_rows: np.ndarray,
+    target_cols: np.ndarray,
+    normalize: bool,
+    fill_missing: bool,
+    n_zones: int,
+) -> tuple[Tile, slice, slice, np.ndarray, Optional[dict]]:
+    row_off, col_off, _, _ = region_window
+
+    with rasterio.open(input_path) as src:
+        window = Window(
+            col_off + tile.halo_col0,
+            row_off + tile.halo_row0,
+            tile.halo_col1 - tile.halo_col0,
+            tile.halo_row1 - tile.halo_row0,
+        )
+        data = src.read(1, window=window).astype(np.float32)
+        core_transform = window_transform(
+            Window(col_off + tile.col0, row_off + tile.row0,
+                   tile.col1 - tile.col0, tile.row1 - tile.row0),
+            src.transform,
+        )
+
+    core = tile.core
+    stats = _zone_statistics(data[core], core_transform, n_zones)
+
+    nodata_mask = ~(data >= 0)
+    if fill_missing and nodata_mask.any() and not nodata_mask.all():
+        indices = ndimage.distance_transform_edt(
+            nodata_mask, return_distances=False, return_indices=True
+        )
+        data = data[tuple(indices)]
+        nodata_mask = ~(data >= 0)
+
+    if normalize:
+        min_val = NORMALIZATION_CONFIG["precip_min"]
+        max_val = NORMALIZATION_CONFIG["precip_max"]
+        data = np.clip((data - min_val) / (max_val - min_val), 0, 1)
+    data[nodata_mask] = 0
+
+    row_sel = np.flatnonzero((target_rows >= tile.row0) & (target_rows < tile.row1))
+    col_sel = np.flatnonzero((target_cols >= tile.col0) & (target_cols < tile.col1))
+    out_rows = slice(row_sel[0], row_sel[-1] + 1) if len(row_sel) else slice(0, 0)
+    out_cols = slice(col_sel[0], col_sel[-1] + 1) if len(col_sel) else slice(0, 0)
+
+    if len(row_sel) == 0 or len(col_sel) == 0:
+        block = np.empty((len(row_sel), len(col_sel)), dtype=np.float32)
+    else:
+        rows = target_rows[row_sel] - tile.halo_row0
+        cols = target_cols[col_sel] - tile.halo_col0
+        grid = np.meshgrid(rows, cols, indexing="ij")
+        block = ndimage.map_coordinates(data, grid, order=1, mode="nearest").astype(np.float32)
+
+    return tile, out_rows, out_cols, block, stats
+
+
+class TiledRasterProcessor:
+    def __init__(
+        self,
+        region: Optional[str | dict] = None,
+        tile_size: Optional[int] = None,
+        halo: Optional[int] = None,
+        workers: Optional[int] = None,
+        max_inflight: Optional[int] = None,
+    ):
+        self.region = get_region(region)
+        self.bbox = self.region["bbox"]
+        self.tile_size = tile_size or TILING_CONFIG["tile_size"]
+        self.halo = TILING_CONFIG["halo"] if halo is None else halo
+        self.workers = workers or TILING_CONFIG["workers"] or os.cpu_count() or 1
+        self.max_inflight = max_inflight or TILING_CONFIG["max_inflight"] or 2 * self.workers
+
+        if self.halo < 1:
+            raise ValueError("Tile halo must be at least one pixel for bilinear resampling")
+
+    def region_window(self, input_path: Path) -> tuple[int, int, int, int]:
+        with rasterio.open(input_path) as src:
+            return bbox_window(src, self.bbox)
+
+    def plan(self, input_path: Path) -> tuple[tuple[int, int, int, int], list[Tile]]:
+        window = self.region_window(input_path)
+        return window, plan_tiles(window[2:], self.tile_size, self.halo)
+
+    def process(
+        self,
+        input_path: Path,
+        target_shape: Optional[tuple] = None,
+        boundaries: Optional[list[dict]] = None,
+        normalize: bool = True,
+        fill_missing: bool = True,
+        out: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, list[dict]]:
+        if normalize and NORMALIZATION_CONFIG["method"] != "minmax":
+            raise ValueError(
+                "Tiled processing supports only minmax normalization; "
+                f"got {NORMALIZATION_CONFIG['method']}"
+            )
+
+        window, tiles = self.plan(input_path)
+        region_shape = window[2:]
+        if target_shape is None:
+            target_shape = region_shape
+
+        if out is None:
+            out = np.empty(target_shape, dtype=np.float32)
+        target_rows = resample_coordinates(region_shape[0], target_shape[0])
+        target_cols = resample_coordinates(region_shape[1], target_shape[1])
+
+        boundaries = boundaries or []
+        geometries = [b["geometry_geojson"] for b in boundaries]
+        n_zones = len(boundaries)
+        totals = {
+            "total": np.zeros(n_zones + 1, dtype=np.int64),
+            "count": np.zeros(n_zones + 1, dtype=np.int64),
+            "sum": np.zeros(n_zones + 1),
+            "min": np.full(n_zones + 1, np.inf),
+            "max": np.full(n_zones + 1, -np.inf),
+        }
+
+        def merge(result):
+            tile, out_rows, out_cols, block, stats = result
+            out[out_rows, out_cols] = block
+            if stats is not None:
+                for key in ("total", "count", "sum"):
+                    totals[key] += stats[key]
+                np.minimum(totals["min"], stats["min"], out=totals["min"])
+                np.maximum(totals["max"], stats["max"], out=totals["max"])
+            instrumentation.count("tiles_processed", region=self.region["key"])
+
+        args = (str(input_path), window)
+        options = (target_rows, target_cols, normalize, fill_missing, n_zones)
+
+        with instrumentation.timer("tiled_raster", region=self.region["key"]):
+            if self.workers <= 1 or len(tiles) == 1:
+                _init_tile_worker(geometries)
+                for tile in tiles:
+                    merge(_process_tile(*args, tile, *options))
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_tile_worker,
+                    initargs=(geometries,),
+                ) as executor:
+                    pending = set()
+                    for tile in tiles:
+                        if len(pending) >= self.max_inflight:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                merge(future.result())
+                        pending.add(executor.submit(_process_tile, *args, tile, *options))
+                    for future in wait(pending).done:
+                        merge(future.result())
+
+        logger.info(
+            f"Processed {len(tiles)} tiles of {self.region['name']} "
+            f"({region_shape[0]}x{region_shape[1]} -> {target_shape[0]}x{target_shape[1]})"
+        )
+        return out, self._boundary_statistics(boundaries, totals)
+
+    @staticmethod
+    def _boundary_statistics(boundaries: list[dict], totals: dict) -> list[dict]:
+        stats = []
+        for i, boundary in enumerate(boundaries, start=1):
+            count = int(totals["count"][i])
+            stats.append(
+                {
+                    "subcounty_code": boundary.get("subcounty_code"),
+                    "total_pixels": int(totals["total"][i]),
+                    "valid_pixels": count,
+                    "mean_precip_mm": round(float(totals["sum"][i] / count), 2) if count else None,
+                    "min_precip_mm": round(float(totals["min"][i]), 2) if count else None,
+                    "max_precip_mm": round(float(totals["max"][i]), 2) if count else None,
+                }
+            )
+        return stats
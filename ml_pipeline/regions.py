@@ -0,0 +1,42 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import sys
+sys.path.append(str(Path(__file__).parent))
+from config import DEFAULT_REGION, REGIONS_PATH
+
+BBOX_KEYS = ("min_lat", "max_lat", "min_lng", "max_lng")
+
+
+@lru_cache(maxsize=None)
+def _load_regions(path: Path) -> dict[str, dict]:
+    with open(path) as f:
+        regions = json.load(f)
+
+    for key, region in regions.items():
+        bbox = region.get("bbox", {})
+        missing = [k for k in BBOX_KEYS if k not in bbox]
+        if missing:
+            raise ValueError(f"Region {key} in {path} is missing bbox keys {missing}")
+        if bbox["min_lat"] >= bbox["max_lat"] or bbox["min_lng"] >= bbox["max_lng"]:
+            raise ValueError(f"Region {key} in {path} has an empty bbox")
+        region.setdefault("name", key)
+
+    return regions
+
+
+def load_regions(path: Optional[Path] = None) -> dict[str, dict]:
+    return _load_regions(path or REGIONS_PATH)
+
+
+def get_region(region: Optional[str | dict] = None) -> dict:
+    if isinstance(region, dict):
+        return {"key": region.get("name", "custom"), **region}
+
+    key = region or DEFAULT_REGION
+    regions = load_regions()
+    if key not in regions:
+        raise ValueError(f"Unknown region {key!r}; available: {sorted(regions)}")
+    return {"key": key, **regions[key]}
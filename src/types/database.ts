@@ -508,6 +508,8 @@ export type Database = {
           feature_date: string;
           model_version: string;
           feature_vector: number[];
+          feature_vector_f32: string | null;
+          feature_dim: number | null;
           cumulative_precip_mm: number;
           precip_anomaly_pct: number;
           spi_1month: number;
@@ -528,6 +530,8 @@ export type Database = {
           feature_date: string;
           model_version?: string;
           feature_vector?: number[];
+          feature_vector_f32?: string | null;
+          feature_dim?: number | null;
           cumulative_precip_mm?: number;
           precip_anomaly_pct?: number;
           spi_1month?: number;
@@ -548,6 +552,8 @@ export type Database = {
           feature_date?: string;
           model_version?: string;
           feature_vector?: number[];
+          feature_vector_f32?: string | null;
+          feature_dim?: number | null;
           cumulative_precip_mm?: number;
           precip_anomaly_pct?: number;
           spi_1month?: number;
@@ -0,0 +1,18 @@
+/*
+  # Add compact float32 feature vector column
+
+  1. Modified Tables
+    - `cnn_extracted_features`
+      - `feature_vector_f32` (text) - Base64-encoded little-endian float32 CNN feature vector
+      - `feature_dim` (smallint) - Number of float32 values in `feature_vector_f32`
+
+  2. Notes
+    - The ML pipeline writes `feature_vector_f32` and leaves `feature_vector` at its
+      '[]' default; a 128-d vector is 684 bytes instead of ~2.5 KB of JSON.
+    - Existing rows keep their JSONB `feature_vector`; readers fall back to it when
+      `feature_vector_f32` is null.
+*/
+
+ALTER TABLE cnn_extracted_features
+  ADD COLUMN IF NOT EXISTS feature_vector_f32 text,
+  ADD COLUMN IF NOT EXISTS feature_dim smallint;
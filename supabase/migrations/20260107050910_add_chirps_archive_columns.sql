@@ -0,0 +1,21 @@
+/*
+  # Track clipped COG archive alongside the source CHIRPS download
+
+  1. Modified Tables
+    - `chirps_raster_metadata`
+      - `archive_format` (text) - 'source' for the continental GeoTIFF, 'cog' for a clipped COG
+      - `source_file_path` (text) - Path to the original download, null once it is dropped
+      - `source_file_size_bytes` (bigint) - Size of the original download
+      - `source_checksum` (text) - MD5 checksum of the original download
+
+  2. Notes
+    - When the archive stage is enabled, `file_path`, `file_size_bytes` and `checksum`
+      describe the clipped COG that the pipeline reads; the `source_*` columns keep
+      the provenance of the continental file it was cut from.
+*/
+
+ALTER TABLE chirps_raster_metadata
+  ADD COLUMN IF NOT EXISTS archive_format text NOT NULL DEFAULT 'source' CHECK (archive_format IN ('source', 'cog')),
+  ADD COLUMN IF NOT EXISTS source_file_path text,
+  ADD COLUMN IF NOT EXISTS source_file_size_bytes bigint,
+  ADD COLUMN IF NOT EXISTS source_checksum text;
@@ -0,0 +1,15 @@
+/*
+  # Record monthly CHIRPS rasters derived from dekadal downloads
+
+  1. Modified Tables
+    - `chirps_raster_metadata`
+      - `derived_from` (jsonb) - Dekadal files summed into this monthly raster, null when
+        the raster was downloaded directly
+
+  2. Notes
+    - A derived monthly row keeps the monthly product URL in `source_url` so it stays
+      keyed to the CHIRPS product it replaces.
+*/
+
+ALTER TABLE chirps_raster_metadata
+  ADD COLUMN IF NOT EXISTS derived_from jsonb;